@@ -0,0 +1,287 @@
+"""
+Benchmark the Minesweeper engine.
+
+Run with `task benchmark`, or `python -m benchmarks.minesweeper --help` for the
+options. Results are printed and saved as JSON, so runs on different commits
+can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+import typing as t
+from pathlib import Path
+
+# Trace logging would be most of what gets measured
+os.environ.setdefault("DEBUG", "false")
+
+from griffinbot.exts.minesweeper import GameBoard  # noqa: E402
+from griffinbot.minesweeper.board import Board  # noqa: E402
+
+# Board sizes, and bomb densities to run every size with
+SIZES = ((8, 8), (16, 16), (30, 16), (50, 50))
+QUICK_SIZES = ((8, 8), (16, 16))
+DENSITIES = (0.12, 0.2)
+
+Benchmark = t.Callable[[int, int, int, int], t.Callable[[], object]]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> t.Callable[[Benchmark], Benchmark]:
+    """Register a benchmark.
+
+    Benchmarks take the board width, height, bomb count and a seed, set up
+    anything that shouldn't be timed, and return the function to time.
+    """
+
+    def decorator(func: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def started_game(width: int, height: int, bombs: int, seed: int) -> GameBoard:
+    """Make a game with its bombs placed and the first click made in the center."""
+    game = GameBoard(width, height, bombs, seed=seed)
+    game.tile(width // 2, height // 2).left_click()
+    return game
+
+
+def copy_game(game: GameBoard) -> GameBoard:
+    """Copy a game, without any of its render caches."""
+    copy = GameBoard(*game.dimensions)
+    copy.board = game.board.copy()
+    return copy
+
+
+def safe_script(game: GameBoard, seed: int) -> list[tuple[int, int]]:
+    """Get every covered safe square of a game, in a random order."""
+    board = game.board
+    script = [
+        board.position(index)
+        for index in range(board.size)
+        if board.covered[index] and not board.bombs[index]
+    ]
+    random.Random(seed).shuffle(script)
+    return script
+
+
+@benchmark("start")
+def bench_start(width: int, height: int, bombs: int, seed: int) -> t.Callable:
+    """Place the bombs of a new game."""
+    random.seed(seed)
+
+    def run() -> None:
+        GameBoard(width, height, bombs).start(width // 2, height // 2)
+
+    return run
+
+
+@benchmark("first-click")
+def bench_first_click(width: int, height: int, bombs: int, seed: int) -> t.Callable:
+    """Place the bombs and flood fill from the first click."""
+    random.seed(seed)
+
+    def run() -> None:
+        GameBoard(width, height, bombs).tile(width // 2, height // 2).left_click()
+
+    return run
+
+
+@benchmark("cleared")
+def bench_cleared(width: int, height: int, bombs: int, seed: int) -> t.Callable:
+    """Check if a game in progress is cleared."""
+    return started_game(width, height, bombs, seed).cleared
+
+
+@benchmark("scripted-game")
+def bench_scripted_game(width: int, height: int, bombs: int, seed: int) -> t.Callable:
+    """Win a game by digging every safe square, checking for a win each move."""
+    start = started_game(width, height, bombs, seed)
+    script = safe_script(start, seed)
+
+    def run() -> None:
+        game = copy_game(start)
+        for x, y in script:
+            game.tile(x, y).left_click()
+            if game.cleared():
+                break
+
+    return run
+
+
+@benchmark("replay")
+def bench_replay(width: int, height: int, bombs: int, seed: int) -> t.Callable:
+    """Rebuild a won game from its seed and move log."""
+    game = started_game(width, height, bombs, seed)
+    for x, y in safe_script(game, seed):
+        game.tile(x, y).left_click()
+    moves = bytes(game.board.moves)
+
+    def run() -> None:
+        Board.replay(width, height, bombs, seed, moves)
+
+    return run
+
+
+@benchmark("render")
+def bench_render(width: int, height: int, bombs: int, seed: int) -> t.Callable:
+    """Render a game in progress from scratch."""
+    start = started_game(width, height, bombs, seed)
+
+    def run() -> None:
+        copy_game(start).to_message()
+
+    return run
+
+
+@benchmark("render-move")
+def bench_render_move(width: int, height: int, bombs: int, seed: int) -> t.Callable:
+    """Re-render a game after each move, like the bot does."""
+    start = started_game(width, height, bombs, seed)
+    script = safe_script(start, seed)
+
+    def run() -> None:
+        game = copy_game(start)
+        game.to_message()
+        for x, y in script[:10]:
+            game.tile(x, y).right_click(1)
+            game.to_message()
+
+    return run
+
+
+@benchmark("render-covered")
+def bench_render_covered(width: int, height: int, bombs: int, seed: int) -> t.Callable:
+    """Render a spoilers board from scratch."""
+    start = started_game(width, height, bombs, seed)
+
+    def run() -> None:
+        copy_game(start).to_covered_message()
+
+    return run
+
+
+def ops_per_second(run: t.Callable, min_time: float, repeat: int) -> float:
+    """Time `run`, returning the best of `repeat` rounds in operations per second."""
+    # Find how many calls take at least `min_time`
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        best = min(best, time.perf_counter() - start)
+    return number / best
+
+
+def peak_memory(run: t.Callable) -> int:
+    """Get the peak memory allocated by one call of `run`, in bytes."""
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def commit() -> t.Optional[str]:
+    """Get the current git commit, if there is one."""
+    try:
+        return subprocess.run(
+            ("git", "rev-parse", "--short", "HEAD"),
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    """Run the benchmarks and save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=Path("benchmarks", "results.json"),
+        help="where to save the results (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-k", "--filter", default="", help="only run benchmarks with this in the name"
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="seconds to run each round for (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="rounds to take the best of (default: %(default)s)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--quick", action="store_true", help="only use small boards")
+    args = parser.parse_args()
+
+    results = []
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+
+        for width, height in QUICK_SIZES if args.quick else SIZES:
+            for density in DENSITIES:
+                bombs = round(width * height * density)
+                run = setup(width, height, bombs, args.seed)
+                result = {
+                    "benchmark": name,
+                    "width": width,
+                    "height": height,
+                    "bombs": bombs,
+                    "ops_per_sec": ops_per_second(run, args.min_time, args.repeat),
+                    "peak_bytes": peak_memory(run),
+                }
+                results.append(result)
+                print(
+                    f"{name:>16} {width:>3}x{height:<3} {bombs:>4} bombs: "
+                    + f"{result['ops_per_sec']:>12,.1f} ops/sec, "
+                    + f"{result['peak_bytes']:>10,} bytes peak"
+                )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "commit": commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "time": time.time(),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Saved the results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,9 @@
 from griffinbot.constants import BOT_ADMINS, DEBUG_MODE
 from griffinbot.constants import Bot as BotConsts
 from griffinbot.constants import Channels  # , Emoji
+from griffinbot.constants import Outbox as OutboxConsts
+from griffinbot.logging import stop as stop_logging
+from griffinbot.outbox import Outbox
 
 log = logging.getLogger("griffinbot.main")
 
@@ -29,6 +32,11 @@
 class Bot(commands.Bot):
     """Subclass of `discord.ext.commands.Bot` with additional functionality."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Messages sent by commands, queued by channel
+        self.outbox = Outbox(OutboxConsts.rate, OutboxConsts.per)
+
     def add_cog(self, cog) -> None:  # noqa: ANN001
         """Add a cog and log it."""
         super().add_cog(cog)
@@ -39,8 +47,20 @@ def remove_cog(self, name) -> None:  # noqa: ANN001
         super().remove_cog(name)
         log.info(f"Cog unloaded: {name}")
 
+    async def on_command_error(
+        self, context: commands.Context, exception: commands.CommandError
+    ) -> None:
+        """Tell cogs about the error, then report it like usual.
+
+        A cog listening to `on_command_error` stops the default handler from
+        printing errors, so cogs listen to `on_command_failed` instead.
+        """
+        self.dispatch("command_failed", context, exception)
+        await super().on_command_error(context, exception)
+
     async def close(self) -> None:
         """Close the bot and database session."""
+        self.outbox.close()
         await super().close()
 
         # Prevents error on windows
@@ -48,6 +68,9 @@ async def close(self) -> None:
         await asyncio.get_event_loop().shutdown_asyncgens()
         await asyncio.sleep(2)
 
+        # Write out the logs that are still queued
+        stop_logging()
+
 
 # Create bot
 intents = Intents.default()
@@ -67,7 +90,7 @@ async def on_ready() -> None:
     """Message that the bot is ready."""
     log.info(f"Logged in as {bot.user}")
 
-    log.trace(f"Time: {datetime.now()}")
+    log.trace("Time: %s", datetime.now())
     channel = bot.get_channel(Channels.bot_log)
     embed = Embed(
         description="Connected!",
@@ -88,7 +111,7 @@ async def on_ready() -> None:
 
 # Log if debug mode is on
 log.info(f"Debug: {DEBUG_MODE}")
-log.trace(f"Debug env variable: {os.environ['DEBUG']}")
+log.trace("Debug env variable: %s", os.environ["DEBUG"])
 
 
 @commands.has_any_role(*BOT_ADMINS)
@@ -126,7 +149,7 @@ async def reload(ctx: commands.Context, cog: str) -> None:
 #         )
 
 #         # Print output if available
-#         log.trace(f"Output: {e.stderr}")
+#         log.trace("Output: %s", e.stderr)
 #         if (
 #             isinstance(e, (subprocess.TimeoutExpired, subprocess.SubprocessError))
 #             and e.stderr
@@ -102,6 +102,16 @@ class Bot(metaclass=JSONGetter):
     bot_token: str
 
 
+class Outbox(metaclass=JSONGetter):
+    """Settings for queueing the messages the bot sends."""
+
+    section = "bot"
+    subsection = "outbox"
+
+    rate: int
+    per: float
+
+
 class StaffRoles(metaclass=JSONGetter):
     """Roles from the guild of the bot."""
 
@@ -135,6 +145,78 @@ class Emoji(metaclass=JSONGetter):
     green_check: str
 
 
+class Metrics(metaclass=JSONGetter):
+    """Settings for the metrics endpoint."""
+
+    section = "metrics"
+
+    host: str
+    port: int
+
+
+class LiveGames(metaclass=JSONGetter):
+    """In-memory Minesweeper game settings."""
+
+    section = "minesweeper"
+    subsection = "games"
+
+    ttl: float
+    max_games: int
+    max_bytes: int
+    save_evicted: bool
+
+
+class GameSaves(metaclass=JSONGetter):
+    """Saved Minesweeper game settings."""
+
+    section = "minesweeper"
+    subsection = "saves"
+
+    path: str
+    delay: float
+
+
+class BoardPool(metaclass=JSONGetter):
+    """Pre-generated Minesweeper board settings."""
+
+    section = "minesweeper"
+    subsection = "board_pool"
+
+    depth: int
+    max_sizes: int
+    min_requests: int
+    presets: list[list]
+
+
+class CoopGames(metaclass=JSONGetter):
+    """Co-op Minesweeper game settings."""
+
+    section = "minesweeper"
+    subsection = "coop"
+
+    edit_interval: float
+
+
+class Spoilers(metaclass=JSONGetter):
+    """Spoilers Minesweeper board settings."""
+
+    section = "minesweeper"
+    subsection = "spoilers"
+
+    max_messages: int
+
+
+class Viewport(metaclass=JSONGetter):
+    """Settings for showing part of a Minesweeper board."""
+
+    section = "minesweeper"
+    subsection = "viewport"
+
+    width: int
+    height: int
+    max_area: int
+
+
 # Groups
 BOT_ADMINS = [StaffRoles.bot_team_role, StaffRoles.admin_role]
 MOD_ROLES = [StaffRoles.mod_role, StaffRoles.admin_role]
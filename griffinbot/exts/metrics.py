@@ -0,0 +1,238 @@
+import logging
+import math
+import time
+import typing as t
+from datetime import datetime
+
+import discord
+from aiohttp import web
+from discord.ext import commands
+
+from griffinbot.constants import BOT_ADMINS
+from griffinbot.constants import Metrics as MetricsConsts
+from griffinbot.logging import dropped_records, queue_depth
+from griffinbot.metrics import Gauge, Histogram, registry
+
+# Most commands to show stats for
+STATS_COMMANDS = 10
+
+log = logging.getLogger(__name__)
+
+COMMANDS = registry.counter(
+    "griffinbot_commands_total", "Commands run, by command.", labels=("command",)
+)
+COMMAND_ERRORS = registry.counter(
+    "griffinbot_command_errors_total",
+    "Commands that failed, by command and error.",
+    labels=("command", "error"),
+)
+COMMAND_SECONDS = registry.histogram(
+    "griffinbot_command_seconds",
+    "Time taken to run commands, by command.",
+    labels=("command",),
+)
+REST_REQUESTS = registry.counter(
+    "griffinbot_rest_requests_total",
+    "Requests to the Discord REST API, by method, route and result.",
+    labels=("method", "route", "result"),
+)
+GATEWAY_LATENCY = registry.gauge(
+    "griffinbot_gateway_latency_seconds", "Latency of the Discord gateway."
+)
+OUTBOX_QUEUED = registry.gauge(
+    "griffinbot_outbox_queued", "Messages waiting to be sent."
+)
+LOG_QUEUE_DEPTH = registry.gauge(
+    "griffinbot_log_queue_depth", "Log records waiting to be written."
+)
+LOG_RECORDS_DROPPED = registry.gauge(
+    "griffinbot_log_records_dropped", "Log records dropped because the queue was full."
+)
+
+
+def format_seconds(seconds: t.Optional[float]) -> str:
+    """Format a duration from a histogram for the stats embed."""
+    if seconds is None:
+        return "-"
+    if seconds < 1:
+        return f"{seconds * 1000:.3g} ms"
+    return f"{seconds:.3g} s"
+
+
+def format_p95(histogram: Histogram, **labels: str) -> str:
+    """Describe the bucket the 95th percentile of a histogram is in."""
+    p95 = histogram.quantile(0.95, **labels)
+    if p95 is None:
+        return "p95 -"
+    if math.isinf(p95):
+        return f"p95 over {format_seconds(histogram.buckets[-1])}"
+    return f"p95 under {format_seconds(p95)}"
+
+
+class Metrics(commands.Cog):
+    """Metrics about how the bot is doing."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._runner: t.Optional[web.AppRunner] = None
+
+        GATEWAY_LATENCY.set_function(lambda: self.bot.latency)
+        OUTBOX_QUEUED.set_function(lambda: len(self.bot.outbox))
+        LOG_QUEUE_DEPTH.set_function(queue_depth)
+        LOG_RECORDS_DROPPED.set_function(dropped_records)
+
+        self._request = self.count_requests(self.bot.http.request)
+        self.bot.http.request = self._request
+
+        self.bot.loop.create_task(self.start_server())
+
+    def cog_unload(self) -> None:
+        """Stop collecting metrics and serving them."""
+        for gauge in (
+            GATEWAY_LATENCY,
+            OUTBOX_QUEUED,
+            LOG_QUEUE_DEPTH,
+            LOG_RECORDS_DROPPED,
+        ):
+            gauge.set_function(None)
+        if self.bot.http.__dict__.get("request") is self._request:
+            del self.bot.http.request
+        if self._runner is not None:
+            self.bot.loop.create_task(self._runner.cleanup())
+            self._runner = None
+        return super().cog_unload()
+
+    @staticmethod
+    def count_requests(request: t.Callable) -> t.Callable:
+        """Wrap the REST request method of the bot to count the requests made."""
+
+        async def counted_request(route: discord.http.Route, **kwargs) -> object:
+            result = "ok"
+            try:
+                return await request(route, **kwargs)
+            except discord.HTTPException as e:
+                result = str(e.status)
+                raise
+            except Exception:
+                result = "error"
+                raise
+            finally:
+                REST_REQUESTS.inc(method=route.method, route=route.path, result=result)
+
+        return counted_request
+
+    async def start_server(self) -> None:
+        """Serve the metrics in the Prometheus text format, at `/metrics`."""
+        app = web.Application()
+        app.router.add_get("/metrics", self.serve_metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+
+        site = web.TCPSite(runner, MetricsConsts.host, MetricsConsts.port)
+        try:
+            await site.start()
+        except OSError as e:
+            log.warning(f"Couldn't serve metrics: {e}")
+            await runner.cleanup()
+            return
+
+        self._runner = runner
+        log.info(
+            f"Serving metrics at http://{MetricsConsts.host}:{MetricsConsts.port}"
+            + "/metrics"
+        )
+
+    async def serve_metrics(self, request: web.Request) -> web.Response:
+        """Respond with the metrics."""
+        return web.Response(
+            text=registry.render(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx: commands.Context) -> None:
+        """Count commands and start timing them."""
+        ctx.started_at = time.perf_counter()
+        COMMANDS.inc(command=ctx.command.qualified_name)
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context) -> None:
+        """Time commands that finished."""
+        self.observe_latency(ctx)
+
+    @commands.Cog.listener()
+    async def on_command_failed(
+        self, ctx: commands.Context, error: commands.CommandError
+    ) -> None:
+        """Count and time commands that failed."""
+        if isinstance(error, commands.CommandInvokeError):
+            error = error.original
+        command = ctx.command.qualified_name if ctx.command is not None else "unknown"
+        COMMAND_ERRORS.inc(command=command, error=type(error).__name__)
+        self.observe_latency(ctx)
+
+    @staticmethod
+    def observe_latency(ctx: commands.Context) -> None:
+        """Record how long a command took, if it was started."""
+        started_at = getattr(ctx, "started_at", None)
+        if started_at is not None and ctx.command is not None:
+            COMMAND_SECONDS.observe(
+                time.perf_counter() - started_at, command=ctx.command.qualified_name
+            )
+
+    @commands.has_any_role(*BOT_ADMINS)
+    @commands.command(aliases=("metrics",))
+    async def stats(self, ctx: commands.Context) -> None:
+        """View how the bot has been performing since it started."""
+        embed = discord.Embed(
+            title="Stats",
+            colour=discord.Colour.blurple(),
+            timestamp=datetime.now().astimezone(),
+        )
+        embed.add_field(name="Commands:", value=self.command_stats(), inline=False)
+
+        rest = sum(REST_REQUESTS.values.values())
+        failed = sum(
+            count
+            for (_, _, result), count in REST_REQUESTS.values.items()
+            if result != "ok"
+        )
+        embed.add_field(
+            name="REST requests:", value=f"{rest:g} made, {failed:g} failed"
+        )
+
+        # Everything else, like the Minesweeper metrics
+        lines = []
+        for metric in registry.metrics.values():
+            if isinstance(metric, Gauge):
+                lines.append(f"`{metric.name}`: {metric.get():g}")
+            elif isinstance(metric, Histogram) and not metric.labels:
+                lines.append(
+                    f"`{metric.name}`: {metric.count()} observed, "
+                    + f"mean {format_seconds(metric.mean())}, "
+                    + format_p95(metric)
+                )
+        embed.add_field(name="Other:", value="\n".join(lines) or "-", inline=False)
+
+        await self.bot.outbox.send(ctx, embed=embed)
+
+    def command_stats(self) -> str:
+        """Describe the runs, errors and latency of the most used commands."""
+        errors: dict[str, float] = {}
+        for (command, _), count in COMMAND_ERRORS.values.items():
+            errors[command] = errors.get(command, 0) + count
+
+        most_used = sorted(COMMANDS.values.items(), key=lambda item: -item[1])
+        lines = []
+        for (command,), count in most_used[:STATS_COMMANDS]:
+            lines.append(
+                f"`{command}`: {count:g} runs, {errors.get(command, 0):g} errors, "
+                + f"mean {format_seconds(COMMAND_SECONDS.mean(command=command))}, "
+                + format_p95(COMMAND_SECONDS, command=command)
+            )
+        return "\n".join(lines) or "None yet."
+
+
+def setup(bot: commands.Bot) -> None:
+    """Add the metrics cog."""
+    bot.add_cog(Metrics(bot))
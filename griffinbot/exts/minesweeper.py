@@ -1,68 +1,225 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
+import math
+import re
+import struct
+import sys
 import typing as t
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from random import sample
 
 import discord
 from discord.ext import commands, tasks
 
-from griffinbot.constants import Bot, Emoji, MOD_ROLES, StaffRoles
+from griffinbot.constants import BoardPool as BoardPoolConsts
+from griffinbot.constants import Bot, CoopGames, Emoji, GameSaves, LiveGames
+from griffinbot.constants import MOD_ROLES
+from griffinbot.constants import Spoilers, StaffRoles, Viewport
+from griffinbot.logging import setup_worker
+from griffinbot.metrics import FAST_BUCKETS, registry
+from griffinbot.minesweeper.batcher import UpdateBatcher
+from griffinbot.minesweeper.board import Board, DIG, FLAGGED, UNKNOWN, UNMARKED
+from griffinbot.minesweeper.pool import BoardPool
+from griffinbot.minesweeper.reactions import ReactionRouter
+from griffinbot.minesweeper.sessions import (
+    Session,
+    SessionKey,
+    SessionManager,
+    store_key,
+)
+from griffinbot.minesweeper.solver import (
+    HINT_TIME_BUDGET,
+    HintTimeoutError,
+    find_hint,
+    generate_solvable,
+)
+from griffinbot.minesweeper.store import GameStore
 
 log = logging.getLogger(__name__)
 
 
+NUM_EMOJI = {
+    -1: "💣",
+    0: "🟦",
+    1: "1️⃣",
+    2: "2️⃣",
+    3: "3️⃣",
+    4: "4️⃣",
+    5: "5️⃣",
+    6: "6️⃣",
+    7: "7️⃣",
+    8: "8️⃣",
+    9: "9️⃣",
+    10: "🔟",
+    11: "<:11:803632726509879346>",
+    12: "<:12:803633006790049806>",
+    13: "<:13:803633045742682173>",
+    14: "<:14:803633082330644492>",
+    15: "<:15:803633109945155664>",
+    16: "<:16:803633136763142175>",
+    17: "<:17:803633168640245790>",
+    18: "<:18:803633195106172958>",
+    19: "<:19:803633223913177089>",
+    20: "<:20:803633257358163968>",
+}
+# Longest side of a board, so every row and column has an emoji label
+MAX_SIDE = max(NUM_EMOJI)
+# Shown when covered, indexed by flag state: 0 = ⬜, 1 = 🚩, 2 = ❓
+COVERED_EMOJI = ("⬜", "🚩", "❓")
+# Shown for covered tiles once the game is over
+GAMEOVER_BOMB_EMOJI = ":bomb:"
+GAMEOVER_FLAG_EMOJI = ":flag_black:"
+# Shown when revealed, indexed by adjacent bomb count
+REVEALED_EMOJI = tuple(NUM_EMOJI[n] for n in range(9))
+# Shown under spoiler tags, indexed by adjacent bomb count
+SPOILER_EMOJI = tuple(f"||{emoji}||" for emoji in REVEALED_EMOJI)
+SPOILER_BOMB_EMOJI = f"||{NUM_EMOJI[-1]}||"
+# The longest a tile of a spoilers board can be
+SPOILER_TILE_LENGTH = max(
+    len(emoji) for emoji in (*SPOILER_EMOJI, SPOILER_BOMB_EMOJI, *REVEALED_EMOJI)
+)
+
+# Discord's limit on the length of an embed description
+EMBED_DESCRIPTION_LIMIT = 4096
+
+# Reactions for digging, flagging, marking, clearing and cancelling a click
+CLICK_EMOJI = ("⛏️", "🚩", "❓", "🧼", "🚫")
+CLICK_ACTIONS = {"⛏️": DIG, "🚩": FLAGGED, "❓": UNKNOWN, "🧼": UNMARKED}
+
+# Moves like `3,4` to dig, `f3,4` to flag, `?3,4` to mark and `c3,4` to clear
+MOVE_REGEX = re.compile(r"([f?c]?)(\d+),(\d+)", re.IGNORECASE)
+MOVE_ACTIONS = {"": DIG, "f": FLAGGED, "?": UNKNOWN, "c": UNMARKED}
+
+# Co-op games are shared by everyone in a channel, as this user ID
+COOP_USER_ID = 0
+
+# Hints found at once, in their own processes so making boards can't delay them
+HINT_WORKERS = 2
+
+# Directions to pan the viewport of a board in
+PAN_DIRECTIONS = {
+    "up": (0, -1),
+    "u": (0, -1),
+    "down": (0, 1),
+    "d": (0, 1),
+    "left": (-1, 0),
+    "l": (-1, 0),
+    "right": (1, 0),
+    "r": (1, 0),
+}
+
+LIVE_GAMES = registry.gauge("minesweeper_live_games", "Minesweeper games in memory.")
+REVEAL_SECONDS = registry.histogram(
+    "minesweeper_reveal_seconds",
+    "Time taken to make the moves of a Minesweeper click.",
+    buckets=FAST_BUCKETS,
+)
+RENDER_SECONDS = registry.histogram(
+    "minesweeper_render_seconds",
+    "Time taken to render a Minesweeper board.",
+    buckets=FAST_BUCKETS,
+)
+
+# Last update timestamp, solvable flag, and board message channel and message IDs
+# of a saved game
+_GAME_HEADER = struct.Struct("<d?QQ")
+
+
 def num_to_emoji(x: int) -> str:
     """Convet int to emoji."""
     if x <= 20:
-        return {
-            -1: "💣",
-            0: "🟦",
-            1: "1️⃣",
-            2: "2️⃣",
-            3: "3️⃣",
-            4: "4️⃣",
-            5: "5️⃣",
-            6: "6️⃣",
-            7: "7️⃣",
-            8: "8️⃣",
-            9: "9️⃣",
-            10: "🔟",
-            11: "<:11:803632726509879346>",
-            12: "<:12:803633006790049806>",
-            13: "<:13:803633045742682173>",
-            14: "<:14:803633082330644492>",
-            15: "<:15:803633109945155664>",
-            16: "<:16:803633136763142175>",
-            17: "<:17:803633168640245790>",
-            18: "<:18:803633195106172958>",
-            19: "<:19:803633223913177089>",
-            20: "<:20:803633257358163968>",
-        }[x]
+        return NUM_EMOJI[x]
     return f"{x}  "
 
 
+def pack_rows(rows: t.Iterable[str], limit: int = EMBED_DESCRIPTION_LIMIT) -> list[str]:
+    """Join rows with newlines into as few chunks of at most `limit` characters.
+
+    Rows are never split, so raises `ValueError` if a row is longer than `limit`.
+    """
+    chunks = []
+    chunk: list[str] = []
+    length = 0
+    for row in rows:
+        if len(row) > limit:
+            raise ValueError(f"Row of {len(row)} characters is over {limit}")
+
+        # The newline joining the row to the chunk counts too
+        if chunk and length + 1 + len(row) > limit:
+            chunks.append("\n".join(chunk))
+            chunk = []
+            length = 0
+
+        length += len(row) + (1 if chunk else 0)
+        chunk.append(row)
+
+    if chunk:
+        chunks.append("\n".join(chunk))
+    return chunks
+
+
+def spoilers_board_chunks(x_bombs: int, y_bombs: int) -> int:
+    """Get how many chunks a spoilers board could need, at most.
+
+    Returns 0 if a single row is too long for one embed.
+    """
+    row_length = x_bombs * SPOILER_TILE_LENGTH
+    if row_length > EMBED_DESCRIPTION_LIMIT:
+        return 0
+
+    rows_per_chunk = (EMBED_DESCRIPTION_LIMIT + 1) // (row_length + 1)
+    return math.ceil(y_bombs / rows_per_chunk)
+
+
 class GameBoard:
-    """Represents a Minesweeper game board."""
+    """Represents a Minesweeper game board.
+
+    The cell state lives in a compact `Board`; `GameBoard` and `Tile` are thin
+    views over it. Solvable boards get their bombs from the no-guess generator
+    instead of `start`.
+
+    Boards bigger than the viewport only show the part of the board around the
+    last move, so the message size doesn't depend on the board size.
+    """
 
-    def __init__(self, x_bombs: int = 10, y_bombs: int = 10, num_bombs: int = 8):
+    def __init__(
+        self,
+        x_bombs: int = 10,
+        y_bombs: int = 10,
+        num_bombs: int = 8,
+        solvable: bool = False,
+        seed: t.Optional[int] = None,
+        safe_zone: bool = False,
+    ):
         self.guesses = 0
-        self.started = False
+        self.solvable = solvable
+        # Where the board message of the game is, once it's been sent
+        self.channel_id = None
+        self.message_id = None
         self.x_bombs = x_bombs
         self.y_bombs = y_bombs
         self.bombs = num_bombs
-        self.gameover = False
         self.updated = datetime.now()
         self.dimensions = (x_bombs, y_bombs, num_bombs)
 
-        self.buttons = []
-        for y_coord in range(y_bombs):
-            row = []
-            for x_coord in range(x_bombs):
-                row.append(Tile(self, x_coord, y_coord))
-            self.buttons.append(row)
+        self.board = Board(x_bombs, y_bombs, num_bombs, seed, safe_zone)
+        self.buttons = TileGrid(self)
+
+        # The top left corner and size of the part of the board that's shown
+        self.view_x = 0
+        self.view_y = 0
+        self.view_width = min(x_bombs, Viewport.width)
+        self.view_height = min(y_bombs, Viewport.height)
+
+        # Render caches of the shown rows, only dirty rows are re-rendered
+        self._header = None
+        self._rows: dict[int, str] = {}
+        self._dirty_rows = set(range(self.view_height))
+        self._rendered_gameover = False
+        self._covered_rows = None
 
     def __str__(self):
         return (
@@ -73,42 +230,144 @@ def __str__(self):
     def __repr__(self):
         return str(self)
 
-    def start(self, x: int, y: int) -> None:
-        """Start a new minesweeper game."""
-        button_numbers = {n for n in range(self.x_bombs * self.y_bombs)}
-        button_numbers.remove(y * self.x_bombs + x)
+    @property
+    def started(self) -> bool:
+        """Whether the bombs have been placed yet."""
+        return self.board.started
+
+    @property
+    def gameover(self) -> bool:
+        """Whether the game has ended."""
+        return self.board.gameover
+
+    @property
+    def bombPositions(self) -> list[tuple[int, int]]:  # noqa: N802
+        """The (x, y) positions of all the bombs."""
+        return [
+            self.board.position(index)
+            for index, bomb in enumerate(self.board.bombs)
+            if bomb
+        ]
+
+    @property
+    def cropped(self) -> bool:
+        """Whether only part of the board is shown."""
+        return self.view_width < self.x_bombs or self.view_height < self.y_bombs
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the game, including its render caches."""
+        rows = [self._header, *self._rows.values(), *(self._covered_rows or ())]
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.__dict__)
+            + self.board.nbytes
+            + sys.getsizeof(self._rows)
+            + sys.getsizeof(self._dirty_rows)
+            + sys.getsizeof(self._covered_rows)
+            + sum(sys.getsizeof(row) for row in rows)
+        )
 
-        bomb_numbers = set(sample(button_numbers, self.bombs))
-        self.bombPositions = []
-        for bomb_number in bomb_numbers:
-            bomb_x = bomb_number % self.x_bombs
-            bomb_y = bomb_number // self.x_bombs
-            self.buttons[bomb_y][bomb_x].bomb()
-            self.bombPositions.append((bomb_x, bomb_y))
+    def to_bytes(self) -> bytes:
+        """Encode the game compactly, for saving."""
+        header = _GAME_HEADER.pack(
+            self.updated.timestamp(),
+            self.solvable,
+            self.channel_id or 0,
+            self.message_id or 0,
+        )
+        return header + self.board.to_bytes()
 
-        for bomb_x, bomb_y in self.bombPositions:
-            for tile in self.buttons[bomb_y][bomb_x].get_adjacent():
-                if not tile.isBomb:
-                    tile.reveal_image_state += 1
+    @staticmethod
+    def from_bytes(data: bytes) -> GameBoard:
+        """Decode a game encoded with `to_bytes`."""
+        try:
+            updated, solvable, channel_id, message_id = _GAME_HEADER.unpack_from(data)
+        except struct.error as e:
+            raise ValueError("Invalid game data") from e
+        board = Board.from_bytes(data[_GAME_HEADER.size :])
+
+        game = GameBoard(board.width, board.height, board.num_bombs, solvable=solvable)
+        game.board = board
+        game.updated = datetime.fromtimestamp(updated)
+        game.channel_id = channel_id or None
+        game.message_id = message_id or None
+        return game
+
+    def tile(self, x: int, y: int) -> Tile:
+        """Get a view of the tile at (x, y)."""
+        return Tile(self, x, y)
 
-        # Mark the game as started
-        self.started = True
+    def start(self, x: int, y: int) -> None:
+        """Start a new minesweeper game."""
+        self.board.start(self.board.index(x, y))
 
     def game_over(self) -> None:
         """Game over."""
-        self.gameover = True
+        self.board.gameover = True
 
     def cleared(self) -> bool:
         """Check if the player has cleared the gameboard of mines."""
-        for row in self.buttons:
-            for tile in row:
-                if (not tile.isBomb) and tile.covered:
-                    return False
-        return True
-
-    def stale(self) -> bool:
-        """Check if the game is stale."""
-        if (datetime.now() - self.updated).total_seconds() > 86400:
+        return self.board.cleared()
+
+    def reveal_all(self) -> None:
+        """Reveal every tile on the board."""
+        self.board.reveal_all()
+        self._dirty_rows.update(range(self.y_bombs))
+
+    def play(self, moves: t.Iterable[tuple[int, int, int]]) -> None:
+        """Apply (x, y, action) moves in one pass, stopping at the first mine.
+
+        The viewport is centered on the last move that was made.
+        """
+        board = self.board
+        last = None
+
+        def indices() -> t.Iterator[tuple[int, int]]:
+            nonlocal last
+            for x, y, action in moves:
+                last = (x, y)
+                yield board.index(x, y), action
+
+        self.mark_dirty(board.play(indices()))
+        if last is not None:
+            self.focus(*last)
+
+    def focus(self, x: int, y: int) -> None:
+        """Center the viewport on (x, y), as far as the board edges allow."""
+        self.move_view(x - self.view_width // 2, y - self.view_height // 2)
+
+    def pan(self, dx: int, dy: int) -> None:
+        """Move the viewport by (dx, dy) squares."""
+        self.move_view(self.view_x + dx, self.view_y + dy)
+
+    def move_view(self, x: int, y: int) -> None:
+        """Move the top left corner of the viewport to (x, y), within the board."""
+        x = max(0, min(x, self.x_bombs - self.view_width))
+        y = max(0, min(y, self.y_bombs - self.view_height))
+
+        if x != self.view_x:
+            # Every row shows different columns
+            self._header = None
+            self._rows.clear()
+        self.view_x = x
+        self.view_y = y
+
+        # Only keep the rows that are still shown, and render the new ones
+        visible = range(y, y + self.view_height)
+        for row in list(self._rows):
+            if row not in visible:
+                del self._rows[row]
+        self._dirty_rows.update(row for row in visible if row not in self._rows)
+
+    def mark_dirty(self, cells: t.Iterable[int]) -> None:
+        """Mark the rows containing `cells` as needing to be re-rendered."""
+        width = self.x_bombs
+        self._dirty_rows.update(cell // width for cell in cells)
+
+    def stale(self, ttl: float = 86400) -> bool:
+        """Check if the game hasn't been updated for `ttl` seconds."""
+        if (datetime.now() - self.updated).total_seconds() > ttl:
             log.trace("Stale")
             return True
         log.trace("Not stale")
@@ -118,46 +377,123 @@ def update(self) -> None:
         """Update the game board to keep it from going stale."""
         self.updated = datetime.now()
 
+    def to_covered_rows(self) -> list[str]:
+        """Return the rows of the board as a covered (spoilers) message."""
+        rows = self._covered_rows
+        if rows is None:
+            rows = [self._render_covered_row(y) for y in range(self.y_bombs)]
+            if self.started:
+                # The hidden contents of the board can't change anymore
+                self._covered_rows = rows
+        return rows
+
     def to_covered_message(self) -> str:
         """Return the board as a covered (spoilers) message."""
-        msg = ""
-        for row in self.buttons:
-            for tile in row:
-                msg = msg + "||" + num_to_emoji(tile.reveal_image_state) + "||"
-            if not row == self.buttons[-1]:
-                msg = msg + "\n"
-        return msg
+        return "\n".join(self.to_covered_rows())
 
     def to_message(self) -> str:
-        """Return the board as a emoji message."""
-        msg = ":blue_square:"
-        x = 1
-        while x <= len(self.buttons[0]):
-            msg = msg + num_to_emoji(x)
-            x += 1
-        x = 1
-        msg = msg + "\n"
-        for row in self.buttons:
-            msg = msg + num_to_emoji(x)
-            x += 1
-            for tile in row:
-                msg = msg + tile.to_emoji()
-            if not row == self.buttons[-1]:
-                msg = msg + "\n"
-        return msg
+        """Return the shown part of the board as a emoji message."""
+        visible = range(self.view_y, self.view_y + self.view_height)
+        if self.gameover != self._rendered_gameover:
+            # Covered tiles look different once the game is over
+            self._rendered_gameover = self.gameover
+            self._dirty_rows.update(visible)
+
+        if self._header is None:
+            self._header = ":blue_square:" + "".join(
+                num_to_emoji(x + 1)
+                for x in range(self.view_x, self.view_x + self.view_width)
+            )
+
+        rows = self._rows
+        for y in self._dirty_rows:
+            if y in visible:
+                rows[y] = self._render_row(y)
+        self._dirty_rows.clear()
+
+        return "\n".join((self._header, *(rows[y] for y in visible)))
+
+    def _render_row(self, y: int) -> str:
+        """Render the shown part of a row of the board, with its label."""
+        board = self.board
+        covered = board.covered
+        flags = board.flags
+        bombs = board.bombs
+        counts = board.counts
+        gameover = board.gameover
+
+        start = y * self.x_bombs + self.view_x
+        cells = [num_to_emoji(y + 1)]
+        for index in range(start, start + self.view_width):
+            if covered[index]:
+                if gameover and bombs[index]:
+                    cells.append(GAMEOVER_BOMB_EMOJI)
+                elif gameover and flags[index] == FLAGGED:
+                    cells.append(GAMEOVER_FLAG_EMOJI)
+                else:
+                    cells.append(COVERED_EMOJI[flags[index]])
+            elif bombs[index]:
+                cells.append(NUM_EMOJI[-1])
+            else:
+                cells.append(REVEALED_EMOJI[counts[index]])
+        return "".join(cells)
+
+    def _render_covered_row(self, y: int) -> str:
+        """Render a single row of the board under spoiler tags.
+
+        Solvable boards show their revealed tiles, so players know where to start.
+        """
+        covered = self.board.covered
+        bombs = self.board.bombs
+        counts = self.board.counts
+        show_revealed = self.solvable
+
+        start = y * self.x_bombs
+        cells = []
+        for index in range(start, start + self.x_bombs):
+            if bombs[index]:
+                cells.append(SPOILER_BOMB_EMOJI)
+            elif show_revealed and not covered[index]:
+                cells.append(REVEALED_EMOJI[counts[index]])
+            else:
+                cells.append(SPOILER_EMOJI[counts[index]])
+        return "".join(cells)
+
+
+class TileGrid:
+    """Lazy `buttons[y][x]` view of a game board's tiles."""
+
+    def __init__(self, gameboard: GameBoard):
+        self.gameboard = gameboard
+
+    def __len__(self):
+        return self.gameboard.y_bombs
+
+    def __iter__(self):
+        for y in range(len(self)):
+            yield self[y]
+
+    def __getitem__(self, y: int) -> list[Tile]:
+        if y < 0:
+            y += len(self)
+        if not 0 <= y < len(self):
+            raise IndexError("row index out of range")
+        return [Tile(self.gameboard, x, y) for x in range(self.gameboard.x_bombs)]
+
+    def __repr__(self):
+        return repr(list(self))
 
 
 class Tile:
     """the Tiles on the board."""
 
+    __slots__ = ("gameboard", "x", "y", "index")
+
     def __init__(self, gameboard: GameBoard, x: int, y: int):
-        self.covered = True
-        self.isBomb = False
+        self.gameboard = gameboard
         self.x = x
         self.y = y
-        self.tile_image_state = 0  # Shown when covered: 0 = 🟦, 1 = 🚩, 2 = ❓
-        self.reveal_image_state = 0  # Shown when revealed: num bombs or -1 if bomb
-        self.gameboard = gameboard
+        self.index = gameboard.board.index(x, y)
 
     def __str__(self):
         return f"{'Tile' if not self.isBomb else 'Bomb'} at ({self.x}, {self.y})"
@@ -165,94 +501,112 @@ def __str__(self):
     def __repr__(self):
         return str(self)
 
-    def left_click(self) -> None:
-        """Simulate a left click by the user."""
-        if self.gameboard.gameover:
-            return  # the game is over
-        elif self.tile_image_state != 0:
-            return  # flag or ?
-        elif not self.gameboard.started:  # start the game
-            self.gameboard.start(
-                self.x,
-                self.y,
-            )
-            self.reveal()
-        elif self.isBomb:  # game over
-            self.gameboard.game_over()
-            return
-        else:  # all good
-            self.reveal()
-
-        if self.gameboard.cleared():
-            self.gameboard.game_over()
-
-    def reveal(self) -> None:
-        """Reveal the tile."""
-        self.covered = False
-        if self.reveal_image_state == 0:
-            for tile in self.get_adjacent():
-                if tile.covered and tile.tile_image_state == 0:
-                    tile.reveal()
+    def __eq__(self, other: object):
+        if not isinstance(other, Tile):
+            return NotImplemented
+        return self.gameboard is other.gameboard and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.gameboard), self.index))
+
+    @property
+    def covered(self) -> bool:
+        """Whether the tile is still covered."""
+        return bool(self.gameboard.board.covered[self.index])
+
+    @covered.setter
+    def covered(self, value: bool) -> None:
+        self.gameboard.board.covered[self.index] = int(value)
+        self.gameboard.mark_dirty((self.index,))
+
+    @property
+    def isBomb(self) -> bool:  # noqa: N802
+        """Whether the tile is a bomb."""
+        return bool(self.gameboard.board.bombs[self.index])
+
+    @property
+    def tile_image_state(self) -> int:
+        """Shown when covered: 0 = 🟦, 1 = 🚩, 2 = ❓."""
+        return self.gameboard.board.flags[self.index]
+
+    @property
+    def reveal_image_state(self) -> int:
+        """Shown when revealed: num bombs or -1 if bomb."""
+        if self.isBomb:
+            return -1
+        return self.gameboard.board.counts[self.index]
+
+    def left_click(self) -> set[int]:
+        """Simulate a left click by the user, returning the revealed cells."""
+        revealed = self.gameboard.board.dig(self.index)
+        self.gameboard.mark_dirty(revealed)
+        return revealed
+
+    def reveal(self) -> set[int]:
+        """Reveal the tile, returning the revealed cells."""
+        revealed = self.gameboard.board.reveal(self.index)
+        self.gameboard.mark_dirty(revealed)
+        return revealed
 
     def right_click(self, image_state: int) -> None:
         """Right click the tile."""
-        if self.gameboard.gameover:
-            return
-        self.tile_image_state = image_state
-
-    def bomb(self) -> None:
-        """Change the tile to a bomb."""
-        self.isBomb = True
-        self.reveal_image_state = -1
+        self.gameboard.board.mark(self.index, image_state)
+        self.gameboard.mark_dirty((self.index,))
 
     def get_adjacent(self) -> list[Tile]:
         """Get the adjacent tiles."""
-        adjacent = []
-        for dx, dy in (
-            (1, -1),
-            (1, 0),
-            (1, 1),
-            (0, 1),
-            (-1, 1),
-            (-1, 0),
-            (-1, -1),
-            (0, -1),
-        ):
-            x_pos = self.x + dx
-            y_pos = self.y + dy
-            if not (
-                x_pos < 0
-                or x_pos >= self.gameboard.x_bombs
-                or y_pos < 0
-                or y_pos >= self.gameboard.y_bombs
-            ):
-                adjacent.append(self.gameboard.buttons[y_pos][x_pos])
-        return adjacent
+        board = self.gameboard.board
+        return [
+            Tile(self.gameboard, *board.position(index))
+            for index in board.neighbors(self.index)
+        ]
 
     def to_emoji(self) -> str:
         """Convert the tile to emoji."""
-        if self.gameboard.gameover:
-            if self.covered:
+        if self.covered:
+            if self.gameboard.gameover:
                 if self.isBomb:
-                    return ":bomb:"
-                elif self.tile_image_state == 1:
-                    return ":flag_black:"
-                return {
-                    0: "⬜",
-                    1: "🚩",
-                    2: "❓",
-                }[self.tile_image_state]
-            else:
-                return num_to_emoji(self.reveal_image_state)
-        else:
-            if self.covered:
-                return {
-                    0: "⬜",
-                    1: "🚩",
-                    2: "❓",
-                }[self.tile_image_state]
-            else:
-                return num_to_emoji(self.reveal_image_state)
+                    return GAMEOVER_BOMB_EMOJI
+                elif self.tile_image_state == FLAGGED:
+                    return GAMEOVER_FLAG_EMOJI
+            return COVERED_EMOJI[self.tile_image_state]
+        return num_to_emoji(self.reveal_image_state)
+
+
+def parse_moves(moves: t.Iterable[str]) -> list[tuple[int, int, int]]:
+    """Parse moves like `3,4` or `f3,4` into (x, y, action) tuples.
+
+    Positions are left 1-indexed. Raises `ValueError` for a move that can't
+    be parsed.
+    """
+    parsed = []
+    for move in moves:
+        match = MOVE_REGEX.fullmatch(move)
+        if match is None:
+            raise ValueError(move)
+
+        action, x, y = match.groups()
+        parsed.append((int(x), int(y), MOVE_ACTIONS[action.lower()]))
+    return parsed
+
+
+def make_spoilers_board(
+    x_bombs: int, y_bombs: int, num_bombs: int, solvable: bool
+) -> tuple[list[str], bool]:
+    """Generate and render a spoilers board.
+
+    Returns the covered message, split into chunks that each fit in an embed,
+    and whether the board is solvable (always true if `solvable` isn't set).
+    Runs in the board generator process pool.
+    """
+    game = GameBoard(x_bombs, y_bombs, num_bombs, solvable=solvable)
+    solved = True
+    if solvable:
+        game.board.seed, solved = generate_solvable(
+            x_bombs, y_bombs, num_bombs, 0, game.board.seed
+        )
+    game.tile(0, 0).left_click()
+    return pack_rows(game.to_covered_rows()), solved
 
 
 class Minesweeper(commands.Cog):
@@ -260,29 +614,294 @@ class Minesweeper(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self._games = {}
-        # self.clear_stale_games.start()
+        self._sessions: SessionManager[GameBoard] = SessionManager(
+            LiveGames.ttl,
+            LiveGames.max_games,
+            LiveGames.max_bytes,
+            on_evict=self.evict_game,
+        )
+        self._reactions = ReactionRouter()
+        # Moves waiting to be made on co-op games
+        self._batchers: dict[SessionKey, UpdateBatcher] = {}
+        self._generator = ProcessPoolExecutor(initializer=setup_worker)
+        self._hints = ProcessPoolExecutor(
+            max_workers=HINT_WORKERS, initializer=setup_worker
+        )
+        # Held while a hint is found, so hints only time out once they've started
+        self._hint_slots = asyncio.Semaphore(HINT_WORKERS)
+        self._store = GameStore(GameSaves.path, GameBoard.from_bytes, GameSaves.delay)
+        self._board_pool = BoardPool(
+            self.make_spoilers_board,
+            depth=BoardPoolConsts.depth,
+            max_sizes=BoardPoolConsts.max_sizes,
+            min_requests=BoardPoolConsts.min_requests,
+        )
+        self.bot.loop.create_task(self.prefill_board_pool())
+        self.clear_stale_games.start()
+        LIVE_GAMES.set_function(self._sessions.__len__)
 
     def cog_unload(self) -> None:
         """Clean up while unloading the cog."""
-        # self.clear_stale_games.cancel()
+        self.clear_stale_games.cancel()
+        LIVE_GAMES.set_function(None)
+        for batcher in self._batchers.values():
+            batcher.close()
+        self._board_pool.close()
+        self._generator.shutdown(wait=False, cancel_futures=True)
+        self._hints.shutdown(wait=False, cancel_futures=True)
+        self._store.close()
         return super().cog_unload()
 
+    @staticmethod
+    def place(ctx: commands.Context) -> tuple[int, int, int]:
+        """Get the guild, channel and user IDs a command was run with."""
+        guild_id = ctx.guild.id if ctx.guild is not None else 0
+        return guild_id, ctx.channel.id, ctx.author.id
+
+    async def get_session(
+        self, ctx: commands.Context
+    ) -> t.Optional[Session[GameBoard]]:
+        """Get the author's game in the channel, or else the channel's co-op game.
+
+        The session has to be locked before changing its game.
+        """
+        guild_id, channel_id, user_id = self.place(ctx)
+        for player in (user_id, COOP_USER_ID):
+            session = await self.load_session(guild_id, channel_id, player)
+            if session is not None:
+                # Update the game to keep it from going stale
+                session.game.update()
+                return session
+        return None
+
+    async def load_session(
+        self, guild_id: int, channel_id: int, user_id: int
+    ) -> t.Optional[Session[GameBoard]]:
+        """Get a user's game in a channel, loading their saved game if needed."""
+        place = (guild_id, channel_id, user_id)
+        session = self._sessions.get(*place)
+        if session is None:
+            key = store_key(*place)
+            game = await self._store.load(key)
+            if game is None:
+                return None
+            if game.stale(LiveGames.ttl):
+                self._store.delete(key)
+                return None
+
+            # Another command might have loaded the game while this one waited
+            session = self._sessions.get(*place)
+            if session is None:
+                session = self._sessions.start(*place, game)
+                log.debug("Loaded the saved Minesweeper game %s", key)
+        return session
+
+    async def send_no_game(self, ctx: commands.Context) -> None:
+        """Tell the author they don't have a game in the channel."""
+        await self.bot.outbox.send(
+            ctx,
+            f"{Emoji.no} You don't have an in-progress minesweeper game here, "
+            + "or your previous game went stale. "
+            + f"Run `{Bot.prefix}ms new-game` to start a new game.",
+        )
+
+    def save_session(self, session: Session[GameBoard]) -> None:
+        """Save the game of a session."""
+        self._store.save(session.key.store_key, session.game)
+
+    def end_session(self, session: Session[GameBoard]) -> None:
+        """End a session and delete its saved game.
+
+        The game is deleted even if the session already ended, since it might
+        have been evicted and saved while it was being played.
+        """
+        self._batchers.pop(session.key, None)
+        self._sessions.end(session)
+        self._store.delete(session.key.store_key)
+
+    def evict_game(self, key: SessionKey, game: GameBoard) -> None:
+        """Save or drop a game that was evicted from memory."""
+        self._batchers.pop(key, None)
+        if LiveGames.save_evicted:
+            self._store.save(key.store_key, game)
+        else:
+            self._store.delete(key.store_key)
+
+    def board_embed(
+        self,
+        author: discord.abc.User,
+        game: GameBoard,
+        color: t.Optional[discord.Color] = None,
+    ) -> discord.Embed:
+        """Make the embed showing a game's board, gold by default."""
+        with RENDER_SECONDS.time():
+            description = game.to_message()
+        embed = discord.Embed(
+            title="Minesweeper",
+            description=description,
+            color=color or discord.Color.gold(),
+            timestamp=datetime.now().astimezone(),
+        ).set_author(
+            name=author.name,
+            icon_url=author.avatar_url_as(static_format="png"),
+        )
+
+        if game.cropped:
+            embed.set_footer(
+                text=f"Showing columns {game.view_x + 1}-"
+                + f"{game.view_x + game.view_width} and rows {game.view_y + 1}-"
+                + f"{game.view_y + game.view_height} of {game.x_bombs}x"
+                + f"{game.y_bombs}. Use {Bot.prefix}ms pan to look around."
+            )
+        return embed
+
+    def spoilers_embeds(
+        self, chunks: list[str], author: t.Optional[discord.abc.User] = None
+    ) -> list[discord.Embed]:
+        """Make an embed for each chunk of a spoilers board, to send in order.
+
+        Only the first embed gets the title and author.
+        """
+        embeds = [
+            discord.Embed(
+                description=chunk,
+                color=discord.Color.gold(),
+                timestamp=datetime.now().astimezone(),
+            )
+            for chunk in chunks
+        ]
+        embeds[0].title = "Spoilers Minesweeper"
+        if author is not None:
+            embeds[0].set_author(
+                name=author.name,
+                icon_url=author.avatar_url_as(static_format="png"),
+            )
+        return embeds
+
+    def board_message(self, game: GameBoard) -> t.Optional[discord.PartialMessage]:
+        """Get the board message of a game, if it still has one."""
+        if game.message_id is None:
+            return None
+        channel = self.bot.get_channel(game.channel_id)
+        if channel is None:
+            return None
+        return channel.get_partial_message(game.message_id)
+
+    async def send_board(
+        self,
+        ctx: commands.Context,
+        game: GameBoard,
+        content: t.Optional[str] = None,
+        color: t.Optional[discord.Color] = None,
+    ) -> None:
+        """Send a new board message for a game.
+
+        The click reactions are added all at once, and reused for every move.
+        """
+        embed = self.board_embed(ctx.author, game, color)
+        message = await self.bot.outbox.send(ctx, content, embed=embed, merge=False)
+        game.channel_id = message.channel.id
+        game.message_id = message.id
+
+        if not game.gameover:
+            await asyncio.gather(
+                *(message.add_reaction(emoji) for emoji in CLICK_EMOJI)
+            )
+
+    async def update_board(
+        self,
+        ctx: commands.Context,
+        game: GameBoard,
+        content: t.Optional[str] = None,
+        color: t.Optional[discord.Color] = None,
+    ) -> None:
+        """Edit a game's board message, or send a new one if it's gone."""
+        message = self.board_message(game)
+        if message is not None:
+            try:
+                await message.edit(
+                    content=content, embed=self.board_embed(ctx.author, game, color)
+                )
+                return
+            except discord.NotFound:
+                log.debug("The board message of %s was deleted", ctx.author)
+
+        await self.send_board(ctx, game, content, color)
+
+    async def prefill_board_pool(self) -> None:
+        """Fill the spoilers board pool with the preset board sizes."""
+        await self.bot.wait_until_ready()
+        for preset in BoardPoolConsts.presets:
+            self._board_pool.prefill(tuple(preset))
+
+    async def make_spoilers_board(
+        self, key: tuple[int, int, int, bool]
+    ) -> tuple[list[str], bool]:
+        """Generate a spoilers board in the process pool, see `make_spoilers_board`."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._generator, make_spoilers_board, *key)
+
+    async def start_solvable(
+        self, ctx: commands.Context, game: GameBoard, x: int, y: int
+    ) -> None:
+        """Place a no-guess layout of bombs on `game`, keeping (x, y) safe.
+
+        Generation runs in a process pool so it can't block the event loop.
+        """
+        log.trace("Generating a solvable board: %s", game.dimensions)
+        loop = asyncio.get_running_loop()
+        index = game.board.index(x, y)
+        async with ctx.typing():
+            seed, solved = await loop.run_in_executor(
+                self._generator,
+                generate_solvable,
+                game.x_bombs,
+                game.y_bombs,
+                game.bombs,
+                index,
+                game.board.seed,
+                game.board.safe_zone,
+            )
+        game.board.seed = seed
+        game.board.start(index)
+
+        if not solved:
+            await self.bot.outbox.send(
+                ctx,
+                f"{Emoji.warning} I couldn't find a board that can be solved "
+                + "without guessing in time, so you might need to guess.",
+            )
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(
+        self, payload: discord.RawReactionActionEvent
+    ) -> None:
+        """Hand reactions to the clicks waiting for them."""
+        self._reactions.dispatch(
+            payload.message_id, payload.user_id, str(payload.emoji)
+        )
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(
+        self, payload: discord.RawReactionActionEvent
+    ) -> None:
+        """Handle removed click reactions the same as added ones."""
+        self._reactions.dispatch(
+            payload.message_id, payload.user_id, str(payload.emoji)
+        )
+
     @tasks.loop(minutes=1.0)
     async def clear_stale_games(self) -> None:
         """Clear stale games from the bot."""
-        stale_games = []
-
-        for game_id, game in self._games.items():
-            if game.stale():
-                stale_games.append(game_id)
+        stale_games = self._sessions.expire()
 
-        for game_id in stale_games:
-            del self._games[game_id]
+        for key in stale_games:
+            self._batchers.pop(key, None)
+            self._store.delete(key.store_key)
 
         stale = len(stale_games)
         log.debug(
-            f"{stale} stale Minesweeper game{'s' if stale != 1 else ''} removed"
+            "%d stale Minesweeper game%s removed", stale, "s" if stale != 1 else ""
         )
 
     @commands.group(invoke_without_command=True, name="minesweeper", aliases=("ms",))
@@ -294,16 +913,25 @@ async def minesweeper_group(self, ctx: commands.Context) -> None:
     @minesweeper_group.command(name="list-games", aliases=("list", "ls", "l"))
     async def list_games(self, ctx: commands.Context) -> None:
         """List all the games currently being played."""
-        await ctx.send(
-            f"{len(self._games)} Game{'s' if len(self._games) != 1 else ''}:"
-        )
+        # Queued together, so they can be merged into one message
+        sends = [
+            self.bot.outbox.send(
+                ctx,
+                f"{len(self._sessions)} Game{'s' if len(self._sessions) != 1 else ''} "
+                + f"({self._sessions.nbytes} bytes):",
+            )
+        ]
 
         message = ""
-        for user, game in self._games.items():
-            message += f"- `{user}`: {game}\n"
+        for key, game in self._sessions.items():
+            user = self.bot.get_user(key.user_id) or key.user_id
+            message += (
+                f"- `{user}` in <#{key.channel_id}>: {game} ({game.nbytes} bytes)\n"
+            )
 
         if message:
-            await ctx.send(message)
+            sends.append(self.bot.outbox.send(ctx, message))
+        await asyncio.gather(*sends)
 
     @minesweeper_group.command(name="spoilers-game", aliases=("s-g", "sg"))
     async def spoilers_game(
@@ -322,11 +950,12 @@ async def spoilers_game(
 
         If you want to play a DM game with one row, you have to include the `dm`
         parameter in the bot command.
-        """
-        if solvable:
-            await ctx.send(f"{Emoji.no} I am not smart enough for that.")
-            return
 
+        Solvable boards can be cleared without guessing, starting from the
+        uncovered squares.
+
+        Big boards are split over several messages.
+        """
         # ========
         #  Checks
         # ========
@@ -347,41 +976,43 @@ async def spoilers_game(
         # ============
         #  Start game
         # ============
-        game = GameBoard(x_distance, y_distance, bombs)
-        game.buttons[0][0].left_click()
-        if area <= 99:
-            log.trace(f"Message area: {area}")
-            if not dm:
-                await ctx.send(
-                    embed=discord.Embed(
-                        title="Spoilers Minesweeper",
-                        description=game.to_covered_message(),
-                        color=discord.Color.gold(),
-                        timestamp=datetime.now().astimezone(),
-                    ).set_author(
-                        name=ctx.author.name,
-                        icon_url=ctx.author.avatar_url_as(static_format="png"),
-                    ),
-                )
-            else:
-                await ctx.author.send(
-                    embed=discord.Embed(
-                        title="Spoilers Minesweeper",
-                        description=game.to_covered_message(),
-                        color=discord.Color.gold(),
-                        timestamp=datetime.now().astimezone(),
+        chunks_needed = spoilers_board_chunks(x_distance, y_distance)
+        if 0 < chunks_needed <= Spoilers.max_messages:
+            log.trace("Message area: %d", area)
+            key = (x_distance, y_distance, bombs, solvable)
+            board = self._board_pool.get(key)
+            if board is None:
+                async with ctx.typing():
+                    board = await self.make_spoilers_board(key)
+
+            chunks, solved = board
+            # Queued together, so the warning goes with the first chunk
+            sends = []
+            if not solved:
+                sends.append(
+                    self.bot.outbox.send(
+                        ctx,
+                        f"{Emoji.warning} I couldn't find a board that can be solved "
+                        + "without guessing in time, so you might need to guess.",
                     )
                 )
+
+            destination = ctx.author if dm else ctx
+            for embed in self.spoilers_embeds(chunks, None if dm else ctx.author):
+                sends.append(self.bot.outbox.send(destination, embed=embed))
+            await asyncio.gather(*sends)
         else:
             if not dm:
-                await ctx.send(
+                await self.bot.outbox.send(
+                    ctx,
                     f"{Emoji.warning} That Minesweeper game is too big. "
-                    + "Please try smaller dimensions."
+                    + "Please try smaller dimensions.",
                 )
             else:
-                await ctx.author.send(
+                await self.bot.outbox.send(
+                    ctx.author,
                     f"{Emoji.warning} That Minesweeper game is too big. "
-                    + "Please try smaller dimensions."
+                    + "Please try smaller dimensions.",
                 )
 
     @minesweeper_group.command(name="new-game", aliases=("n-g", "ng", "n"))
@@ -391,14 +1022,58 @@ async def new_game(
         x_distance: int = 8,
         y_distance: int = 8,
         bombs: int = 10,
+        solvable: bool = False,
+        safe_start: bool = False,
     ) -> None:
         """Make a new Minesweeper game.
 
         If x- or y-distance are changed, but not bombs, bombs will be scaled
         to keep the same difficulty of the Minesweeper game.
+
+        Solvable games can be cleared without guessing from your first click.
+        With a safe start, the squares around your first click have no bombs
+        either.
+
+        Games can be up to 20 by 20. Big games only show the part of the board
+        around your last click, use `ms pan` to look around.
         """
         log.info(f"{ctx.author} started a new Minesweeper game")
+        await self.start_game(
+            ctx, x_distance, y_distance, bombs, solvable, safe_start, ctx.author.id
+        )
+
+    @minesweeper_group.command(name="co-op-game", aliases=("coop", "co-op", "cg"))
+    async def co_op_game(
+        self,
+        ctx: commands.Context,
+        x_distance: int = 8,
+        y_distance: int = 8,
+        bombs: int = 10,
+        solvable: bool = False,
+        safe_start: bool = False,
+    ) -> None:
+        """Make a new Minesweeper game that everyone in the channel plays together.
+
+        It takes the same options as `ms new-game`. Anyone without a game of
+        their own in the channel can click and quit the co-op game. Moves made
+        close together are made at once, in the order they were sent.
+        """
+        log.info(f"{ctx.author} started a new co-op Minesweeper game")
+        await self.start_game(
+            ctx, x_distance, y_distance, bombs, solvable, safe_start, COOP_USER_ID
+        )
 
+    async def start_game(
+        self,
+        ctx: commands.Context,
+        x_distance: int,
+        y_distance: int,
+        bombs: int,
+        solvable: bool,
+        safe_start: bool,
+        user_id: int,
+    ) -> None:
+        """Start a game for `user_id` in the channel, see `new_game`."""
         # ========
         #  Checks
         # ========
@@ -419,180 +1094,354 @@ async def new_game(
         # ============
         #  Start game
         # ============
-        log.trace(f"X: {x_distance}, Y; {y_distance}, Bombs: {bombs}")
-        game = GameBoard(x_distance, y_distance, bombs)
-        if area <= 170:
-            log.trace(f"Message area: {area}")
-            self._games[str(ctx.message.author)] = game
-            await ctx.send(
-                embed=discord.Embed(
-                    title="Minesweeper",
-                    description=game.to_message(),
-                    color=discord.Color.gold(),
-                    timestamp=datetime.now().astimezone(),
-                ).set_author(
-                    name=ctx.author.name,
-                    icon_url=ctx.author.avatar_url_as(static_format="png"),
-                ),
-            )
+        log.trace("X: %d, Y; %d, Bombs: %d", x_distance, y_distance, bombs)
+        game = GameBoard(
+            x_distance, y_distance, bombs, solvable=solvable, safe_zone=safe_start
+        )
+        if area <= Viewport.max_area and max(x_distance, y_distance) <= MAX_SIDE:
+            log.trace("Message area: %d", area)
+            # End the previous game of the user in the channel, with its batcher
+            guild_id, channel_id, _ = self.place(ctx)
+            old = self._sessions.get(guild_id, channel_id, user_id)
+            if old is not None:
+                self.end_session(old)
+            session = self._sessions.start(guild_id, channel_id, user_id, game)
+            async with session.lock:
+                await self.send_board(ctx, game)
+                self.save_session(session)
         else:
-            await ctx.send(
-                f"{Emoji.warning} That Minesweeper game is too big. "
-                + "Please try smaller dimensions."
+            await self.bot.outbox.send(
+                ctx,
+                f"{Emoji.warning} That Minesweeper game is too big. Boards can "
+                + f"be at most {MAX_SIDE} squares wide and tall.",
             )
 
     @minesweeper_group.command(name="quit-game", aliases=("quit", "q"))
     async def quit_game(self, ctx: commands.Context) -> None:
         """Quit a Minesweeper game."""
-        game = self._games[str(ctx.message.author)]
-        if not game.started:
-            game.buttons[0][0].left_click()
-
-        for row in game.buttons:
-            for tile in row:
-                tile.reveal()
-
-        await ctx.send(f"{Emoji.ok} Successfully quit Minesweeper game.")
-        await ctx.send(
-            embed=discord.Embed(
-                title="Minesweeper",
-                description=game.to_message(),
-                color=discord.Color.red(),
-                timestamp=datetime.now().astimezone(),
-            ).set_author(
-                name=ctx.author.name,
-                icon_url=ctx.author.avatar_url_as(static_format="png"),
-            ),
-        )
+        session = await self.get_session(ctx)
+        if session is None:
+            await self.send_no_game(ctx)
+            return
+
+        async with session.lock:
+            if session.ended:
+                return  # Another command ended the game first
 
-        del self._games[str(ctx.message.author)]
+            game = session.game
+            if not game.started:
+                game.tile(0, 0).left_click()
+            game.reveal_all()
+            # End the game before waiting on Discord, so nothing else can use it
+            self.end_session(session)
+
+            await self.update_board(ctx, game, "Game quit.", discord.Color.red())
+            await self.bot.outbox.send(
+                ctx, f"{Emoji.ok} Successfully quit Minesweeper game."
+            )
         log.info(f"{ctx.author} quit their Minesweeper game")
 
-    @minesweeper_group.command(name="click", aliases=("c",))
-    async def click(  # noqa: C901
-        self, ctx: commands.Context, x_position: int, y_position: int
+    @minesweeper_group.command(name="pan", aliases=("p",))
+    async def pan(
+        self, ctx: commands.Context, direction: str, squares: t.Optional[int] = None
     ) -> None:
-        """Click a square.
+        """Look around a game that's too big to show all at once.
+
+        The direction is up, down, left or right, or just the first letter. By
+        default, it moves half of the shown board.
+        """
+        step = PAN_DIRECTIONS.get(direction.lower())
+        if step is None:
+            await self.bot.outbox.send(
+                ctx,
+                f"{Emoji.warning} You can pan up, down, left or right, "
+                + f"not `{direction}`.",
+            )
+            return
+
+        session = await self.get_session(ctx)
+        if session is None:
+            await self.send_no_game(ctx)
+            return
+
+        async with session.lock:
+            if session.ended:
+                return
+
+            game = session.game
+            dx, dy = step
+            if squares is None:
+                squares = (
+                    max(game.view_width * abs(dx), game.view_height * abs(dy)) // 2
+                )
+                squares = max(squares, 1)
+            game.pan(dx * squares, dy * squares)
+
+            await self.update_board(ctx, game)
+
+    @minesweeper_group.command(name="hint", aliases=("h",))
+    async def hint(self, ctx: commands.Context) -> None:
+        """Get a hint for your Minesweeper game.
+
+        The hint is a square that is guaranteed to be safe, or if there aren't
+        any, the square least likely to be a mine.
+        """
+        session = await self.get_session(ctx)
+        if session is None:
+            await self.send_no_game(ctx)
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            async with ctx.typing(), self._hint_slots:
+                # Work on a copy, so moves can be made while the hint is found
+                board = session.game.board.copy()
+                index, probability = await asyncio.wait_for(
+                    loop.run_in_executor(self._hints, find_hint, board),
+                    timeout=HINT_TIME_BUDGET + 1,
+                )
+        except (HintTimeoutError, asyncio.TimeoutError):
+            await self.bot.outbox.send(
+                ctx,
+                f"{Emoji.warning} That board is too complicated for me to find "
+                + "a hint in time.",
+            )
+            return
+
+        x, y = board.position(index)
+        log.trace("Hint: (%d, %d), %.3f", x, y, probability)
+        if probability == 0:
+            await self.bot.outbox.send(
+                ctx, f"{Emoji.ok} ({x + 1}, {y + 1}) is safe to dig."
+            )
+        else:
+            await self.bot.outbox.send(
+                ctx,
+                f"{Emoji.warning} I can't find any squares that are guaranteed "
+                + f"to be safe. ({x + 1}, {y + 1}) is your best bet, with a "
+                + f"{probability:.0%} chance of being a mine.",
+            )
 
-        The bot will add 5 emojis to your message:
+    async def play_moves(
+        self,
+        ctx: commands.Context,
+        session: Session[GameBoard],
+        moves: list[tuple[int, int, int]],
+    ) -> None:
+        """Apply 0-indexed (x, y, action) moves to a game and show the result.
+
+        The moves are applied in order, stopping at the first mine, and the board
+        is only rendered once at the end. Hold the session lock while calling this.
+        """
+        game = session.game
+        if game.solvable and not game.started:
+            # Bombs are only placed by the first dig of an unmarked square, so
+            # find the dig that starts the game, counting the marks before it
+            board = game.board
+            marks: dict[int, int] = {}
+            for first, (x, y, action) in enumerate(moves):
+                index = board.index(x, y)
+                if action != DIG:
+                    marks[index] = action
+                elif marks.get(index, board.flags[index]) == UNMARKED:
+                    game.play(moves[:first])
+                    await self.start_solvable(ctx, game, x, y)
+                    moves = moves[first:]
+                    break
+
+        log.trace("Playing %d moves", len(moves))
+        with REVEAL_SECONDS.time():
+            game.play(moves)
+
+        if game.gameover:
+            # Clean up
+            self.end_session(session)
+
+            if game.cleared():
+                await self.update_board(
+                    ctx, game, ":tada: You won!", discord.Color.green()
+                )
+            else:
+                await self.update_board(
+                    ctx, game, ":pensive: Game over.", discord.Color.red()
+                )
+            return
+
+        self.save_session(session)
+        await self.update_board(ctx, game)
+
+    @minesweeper_group.command(name="click", aliases=("c",))
+    async def click(self, ctx: commands.Context, *moves: str) -> None:
+        """Click a square, or make several moves at once.
+
+        With a single position, like `ms click 3 4`, react to your game's board
+        message to choose what to do:
             - ⛏️ means to break the square
             - 🚩 means to flag the square
             - ❓ means to mark the square as unknown
             - 🧼 means to clear the square
             - 🚫 means to cancel clicking
+
+        Adding or removing a reaction both count, so you don't need to remove
+        your old reactions first.
+
+        You can also list moves as `x,y`, like `ms c 1,2 3,4 f5,6 ?7,8`. A
+        plain position breaks the square, and `f`, `?` and `c` in front of it
+        flag, mark as unknown or clear it. The moves are made in order,
+        stopping if you hit a mine.
+
+        Without a game of your own, you click on the channel's co-op game, where
+        a single position breaks the square straight away.
         """
-        log.trace(f"Click at: {x_position}, {y_position}")
-
-        if str(ctx.message.author) not in self._games:
-            # say something
-            await ctx.send(
-                f"{Emoji.no} You don't have an in-progress minesweeper game. "  # ,"
-                # + "or your previous game went stale. "
-                + f"Run `{Bot.prefix}ms new-game` to start a new game."
-            )
+        log.trace("Click: %s", moves)
+
+        parsed = await self.parse_click(ctx, moves)
+        if parsed is None:
             return
 
-        # Update the game to keep it from going stale
-        # self._games[str(ctx.message.author)].update()
+        session = await self.get_session(ctx)
+        if session is None:
+            await self.send_no_game(ctx)
+            return
 
         # ========
         #  Checks
         # ========
-        x_max, y_max, _ = self._games[str(ctx.message.author)].dimensions
-        if (
-            x_position <= 0
-            or x_position > x_max
-            or y_position <= 0
-            or y_position > y_max
-        ):
-            await ctx.send(
-                f"{Emoji.warning} Make sure your click position fits "
-                + "within the game board."
-            )
-            return
+        x_max, y_max, _ = session.game.dimensions
+        for x_position, y_position, _ in parsed:
+            if not (0 < x_position <= x_max and 0 < y_position <= y_max):
+                await self.bot.outbox.send(
+                    ctx,
+                    f"{Emoji.warning} Make sure your click position "
+                    + f"({x_position}, {y_position}) fits within the game board.",
+                )
+                return
 
         # Subtract for arrays
-        x_position -= 1
-        y_position -= 1
+        parsed = [(x - 1, y - 1, action) for x, y, action in parsed]
+
+        if session.key.user_id == COOP_USER_ID:
+            # Co-op games are shared, so clicks can't wait for a reaction
+            coop_moves = [
+                (x, y, DIG if action is None else action) for x, y, action in parsed
+            ]
+            await self.coop_moves(ctx, session, coop_moves)
+            return
+
+        if parsed[0][2] is None:
+            await self.click_reaction(ctx, session, *parsed[0][:2])
+            return
 
-        # Add click reactions
-        await ctx.message.add_reaction("⛏️")
-        await ctx.message.add_reaction("🚩")
-        await ctx.message.add_reaction("❓")
-        await ctx.message.add_reaction("🧼")
-        await ctx.message.add_reaction("🚫")
+        async with session.lock:
+            if not session.ended:
+                await self.play_moves(ctx, session, parsed)
+
+    async def parse_click(
+        self, ctx: commands.Context, moves: tuple[str, ...]
+    ) -> t.Optional[list[tuple[int, int, t.Optional[int]]]]:
+        """Parse the moves of a click, telling the author if they're invalid.
+
+        A single click like `3 4` has no action, since it's chosen by reacting.
+        """
+        if len(moves) == 2 and all(move.isdigit() for move in moves):
+            x_position, y_position = (int(move) for move in moves)
+            return [(x_position, y_position, None)]
 
         try:
-            reaction, _ = await self.bot.wait_for(
-                "reaction_add",
-                timeout=120.0,
-                check=lambda r, u: r.message == ctx.message
-                and u == ctx.message.author
-                and str(r.emoji) in {"⛏️", "❓", "🚩", "🧼", "🚫"},
+            parsed = parse_moves(moves)
+        except ValueError as e:
+            await self.bot.outbox.send(
+                ctx,
+                f"{Emoji.warning} I don't understand the move `{e}`. "
+                + f"Run `{Bot.prefix}help ms click` to see how to click.",
             )
-        except asyncio.TimeoutError:
-            await ctx.send(f"{Emoji.warning} Game timed out")
-            del self._games[str(ctx.message.author)]
-        else:
-            game = self._games[str(ctx.message.author)]
-
-            log.trace(f"Got reaction: {reaction.emoji}")
-            if str(reaction.emoji) == "⛏️":
-                log.trace(f"Position: ({x_position}, {y_position})")
-                log.trace(f"Buttons: {game.buttons}")
-                log.trace("Digging")
-
-                game.buttons[y_position][x_position].left_click()
-
-                if game.gameover:
-                    if game.cleared():
-                        await ctx.send(":tada: You won!")
-                        await ctx.send(
-                            embed=discord.Embed(
-                                title="Minesweeper",
-                                description=game.to_message(),
-                                color=discord.Color.green(),
-                                timestamp=datetime.now().astimezone(),
-                            ).set_author(
-                                name=ctx.author.name,
-                                icon_url=ctx.author.avatar_url_as(static_format="png"),
-                            ),
-                        )
-                    else:
-                        await ctx.send(":pensive: Game over.")
-                        await ctx.send(
-                            embed=discord.Embed(
-                                title="Minesweeper",
-                                description=game.to_message(),
-                                color=discord.Color.red(),
-                                timestamp=datetime.now().astimezone(),
-                            ).set_author(
-                                name=ctx.author.name,
-                                icon_url=ctx.author.avatar_url_as(static_format="png"),
-                            ),
-                        )
-
-                    # Clean up
-                    del self._games[str(ctx.message.author)]
-                    return
-            elif str(reaction) == "❓":
-                game.buttons[y_position][x_position].right_click(2)
-            elif str(reaction) == "🚩":
-                game.buttons[y_position][x_position].right_click(1)
-            elif str(reaction) == "🧼":
-                game.buttons[y_position][x_position].right_click(0)
-
-            await ctx.send(
-                embed=discord.Embed(
-                    title="Minesweeper",
-                    description=game.to_message(),
-                    color=discord.Color.gold(),
-                    timestamp=datetime.now().astimezone(),
-                ).set_author(
-                    name=ctx.author.name,
-                    icon_url=ctx.author.avatar_url_as(static_format="png"),
-                ),
+            return None
+
+        if not parsed:
+            await self.bot.outbox.send(ctx, f"{Emoji.warning} Tell me where to click.")
+            return None
+        return parsed
+
+    async def coop_moves(
+        self,
+        ctx: commands.Context,
+        session: Session[GameBoard],
+        moves: list[tuple[int, int, int]],
+    ) -> None:
+        """Queue moves for a co-op game, waiting until they've been made.
+
+        Moves from everyone are batched, so the board message is edited at most
+        once every `CoopGames.edit_interval` seconds.
+        """
+        batcher = self._batchers.get(session.key)
+        if batcher is None:
+            batcher = self._batchers[session.key] = UpdateBatcher(
+                functools.partial(self.flush_coop_moves, session),
+                CoopGames.edit_interval,
             )
+        await batcher.add((ctx, moves))
+
+    async def flush_coop_moves(
+        self,
+        session: Session[GameBoard],
+        batch: list[tuple[commands.Context, list[tuple[int, int, int]]]],
+    ) -> None:
+        """Make a batch of co-op moves in one go, with one board edit."""
+        async with session.lock:
+            if session.ended:
+                return  # The game ended before the moves could be made
+
+            moves = [move for _, moves in batch for move in moves]
+            log.trace("Making %d co-op moves from %d clicks", len(moves), len(batch))
+            # The board is shown as the last player to click
+            ctx, _ = batch[-1]
+            await self.play_moves(ctx, session, moves)
+
+    async def click_reaction(
+        self,
+        ctx: commands.Context,
+        session: Session[GameBoard],
+        x_position: int,
+        y_position: int,
+    ) -> None:
+        """Wait for a reaction saying what to do with the square at (x, y).
+
+        The session is only locked once there is a move to make, so other
+        commands can run while waiting.
+        """
+        game = session.game
+        async with session.lock:
+            if session.ended:
+                return
+
+            # The board message already has the click reactions
+            if self.board_message(game) is None:
+                await self.send_board(ctx, game)
+
+        try:
+            reaction = await self._reactions.wait_for(
+                game.message_id, ctx.author.id, CLICK_EMOJI, timeout=120.0
+            )
+        except asyncio.TimeoutError:
+            async with session.lock:
+                if not session.ended:
+                    self.end_session(session)
+                    await self.bot.outbox.send(ctx, f"{Emoji.warning} Game timed out")
+            return
+
+        if reaction is None:
+            return  # Another click took over
+
+        log.trace("Got reaction: %s", reaction)
+        action = CLICK_ACTIONS.get(reaction)
+        if action is None:
+            return  # Cancelled
+
+        async with session.lock:
+            if session.ended:
+                return  # The game ended while waiting
+
+            await self.play_moves(ctx, session, [(x_position, y_position, action)])
 
 
 def setup(bot: commands.Bot) -> None:
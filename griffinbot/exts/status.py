@@ -1,5 +1,7 @@
 import asyncio
 import logging
+import re
+import typing as t
 from datetime import datetime
 from pathlib import Path
 
@@ -12,9 +14,19 @@
 
 )
 
-from griffinbot.constants import Channels, Emoji, StaffRoles
+from griffinbot.constants import Bot, Channels, Emoji, StaffRoles
+from griffinbot.logfiles import (
+    LogIndex,
+    compile_filter,
+    format_timestamp,
+    parse_time,
+    tail,
+)
+from griffinbot.logging import dropped_records, queue_depth
 
 PRECISION = 3
+# Most lines a log search shows
+SEARCH_LIMIT = 200
 
 log = logging.getLogger(__name__)
 
@@ -24,6 +36,7 @@ class Status(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._log_index = LogIndex()
 
     @commands.command(aliases=("latency",))
     async def ping(self, ctx: commands.Context) -> None:
@@ -44,6 +57,14 @@ async def ping(self, ctx: commands.Context) -> None:
 
         embed.add_field(name="Bot latency:", value=bot_latency, inline=False)
         embed.add_field(name="Discord API Latency:", value=api_latency, inline=False)
+        embed.add_field(
+            name="Queued messages:", value=str(len(self.bot.outbox)), inline=False
+        )
+        embed.add_field(
+            name="Log queue:",
+            value=f"{queue_depth()} records waiting, {dropped_records()} dropped",
+            inline=False,
+        )
 
         await ctx.send(embed=embed)
 
@@ -88,42 +109,128 @@ async def restart(self, ctx: commands.Context, delay: int = 0) -> None:
 
     @commands.guild_only()
     @commands.has_any_role(StaffRoles.bot_team_role, StaffRoles.admin_role)
-    @commands.command(name="view-logs", aliases=("log", "logs"))
+    @commands.group(
+        name="view-logs", aliases=("log", "logs"), invoke_without_command=True
+    )
     async def view_logs(
-        self, ctx: commands.Context, num_lines: int = 20, file: str = "bot.log"
+        self,
+        ctx: commands.Context,
+        num_lines: int = 20,
+        file: str = "bot.log",
+        *,
+        text_filter: t.Optional[str] = None,
     ) -> None:
         """View the last `num_lines` lines of the bot's log files.
 
         By default, shows the last 20 lines.
         The file parameter is for the log file to open, must be in the logs directory!
+        If there aren't enough lines, older lines come from the rotated log files.
+
+        Anything after the file only shows lines containing it, or matching it
+        if it's a regex wrapped in slashes, like `/Cog (un)?loaded/`.
         """
-        # Read the file
-        log_file = Path(".") / "logs" / file
+        if Path(file).name != file:
+            await self.bot.outbox.send(
+                ctx, f"{Emoji.warning} The log file must be in the logs folder."
+            )
+            return
+
+        pattern = None
+        if text_filter is not None:
+            try:
+                pattern = compile_filter(text_filter)
+            except re.error as e:
+                await self.bot.outbox.send(
+                    ctx, f"{Emoji.warning} That regex doesn't work: {e}"
+                )
+                return
+
+        # Read the end of the file in a thread, so the bot isn't blocked
         try:
-            with open(log_file, encoding="utf-8") as f:
-                text = f.read()
+            last_lines = await asyncio.to_thread(tail, num_lines, file, pattern)
         except FileNotFoundError:
-            await ctx.send(f"{Emoji.warning} Could not find the log file `{file}`.")
+            await self.bot.outbox.send(
+                ctx, f"{Emoji.warning} Could not find the log file `{file}`."
+            )
             return
 
-        # Get the last `num_lines` lines of the file
-        lines = text.split("\n")
-        if lines[-1] == "":
-            lines.pop(-1)
-        last_lines = lines[-num_lines:]
-
         # Paginate
         paginator = commands.Paginator()
         for line in last_lines:
             paginator.add_line(line)
 
-        # Send the text
-        await ctx.send(
-            f"{Emoji.green_check} Here are the last {num_lines} lines of the "
-            + f"{file} log file!"
+        # Send the text, queued together so pages that fit are merged
+        matching = f" matching `{text_filter}`" if text_filter is not None else ""
+        await asyncio.gather(
+            self.bot.outbox.send(
+                ctx,
+                f"{Emoji.green_check} Here are the last {len(last_lines)} lines"
+                + f"{matching} of the {file} log file!",
+            ),
+            *(self.bot.outbox.send(ctx, page) for page in paginator.pages),
+        )
+
+    @commands.guild_only()
+    @commands.has_any_role(StaffRoles.bot_team_role, StaffRoles.admin_role)
+    @view_logs.command(name="search", aliases=("s",))
+    async def search_logs(
+        self,
+        ctx: commands.Context,
+        since: str,
+        until: str = "now",
+        *,
+        text_filter: t.Optional[str] = None,
+    ) -> None:
+        """Find the lines logged between two times, in all the log files.
+
+        Times can be `now`, a time ago like `15m` or `1h30m`, a time today like
+        `14:30`, or a date and time like `2021-04-01T14:30`.
+
+        Anything after the times only shows lines containing it, or matching it
+        if it's a regex wrapped in slashes, like `/Cog (un)?loaded/`.
+        """
+        try:
+            now = datetime.now()
+            start, end = parse_time(since, now), parse_time(until, now)
+        except ValueError:
+            await self.bot.outbox.send(
+                ctx,
+                f"{Emoji.warning} I don't understand those times. "
+                + f"Run `{Bot.prefix}help logs search` to see how to write them.",
+            )
+            return
+
+        pattern = None
+        if text_filter is not None:
+            try:
+                pattern = compile_filter(text_filter)
+            except re.error as e:
+                await self.bot.outbox.send(
+                    ctx, f"{Emoji.warning} That regex doesn't work: {e}"
+                )
+                return
+
+        # The index is read and updated in a thread, so the bot isn't blocked
+        found, more = await asyncio.to_thread(
+            self._log_index.search, start, end, pattern, SEARCH_LIMIT
+        )
+
+        # Paginate
+        paginator = commands.Paginator()
+        for line in found:
+            paginator.add_line(line)
+
+        matching = f" matching `{text_filter}`" if text_filter is not None else ""
+        header = (
+            f"{Emoji.green_check} Found {'over ' if more else ''}{len(found)} lines"
+            + f"{matching} logged from {format_timestamp(start)} to "
+            + f"{format_timestamp(end)}"
+            + (f", here are the first {len(found)}." if more else ".")
+        )
+        await asyncio.gather(
+            self.bot.outbox.send(ctx, header),
+            *(self.bot.outbox.send(ctx, page) for page in paginator.pages),
         )
-        for page in paginator.pages:
-            await ctx.send(page)
 
     @restart.error
     async def restart_error(self, ctx: commands.Context, error: CommandError) -> None:
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import typing as t
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+LOG_DIR = Path("logs")
+# Bytes to read at a time while reading a file backward
+BLOCK_SIZE = 65536
+
+
+def log_files(name: str, directory: Path = LOG_DIR) -> list[Path]:
+    """Get a log file and the older files it was rotated into, newest first.
+
+    Backups are named like `bot.log.1`, `bot.log.2` and so on, so starting
+    from `bot.log.2` gets `bot.log.3` onward.
+    """
+    base, _, number = name.rpartition(".")
+    if base and number.isdigit():
+        start = int(number) + 1
+    else:
+        base, start = name, 1
+
+    files = [directory / name]
+    for number in range(start, start + 1000):
+        backup = directory / f"{base}.{number}"
+        if not backup.exists():
+            break
+        files.append(backup)
+    return files
+
+
+def reverse_lines(path: Path, block_size: int = BLOCK_SIZE) -> t.Iterator[str]:
+    """Yield the lines of a file from last to first.
+
+    The file is read backward in blocks, so only about a block has to be in
+    memory however big the file is.
+    """
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        if position == 0:
+            return
+
+        partial = b""  # The start of a line that began in an earlier block
+        at_end = True
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + partial).split(b"\n")
+            partial = lines.pop(0)
+
+            if at_end and lines and lines[-1] == b"":
+                lines.pop()  # The file ends with a newline
+            at_end = False
+            for line in reversed(lines):
+                yield line.decode("utf-8", errors="replace")
+
+        yield partial.decode("utf-8", errors="replace")
+
+
+def tail(
+    num_lines: int,
+    name: str = "bot.log",
+    pattern: t.Optional[t.Pattern[str]] = None,
+    directory: Path = LOG_DIR,
+) -> list[str]:
+    """Get the last `num_lines` lines of a log file, oldest first.
+
+    If the file is too short, lines come from the files it was rotated into.
+    With a pattern, only lines it matches are counted. This does blocking I/O,
+    so run it in a thread.
+    """
+    found: list[str] = []
+    if num_lines <= 0:
+        return found
+
+    for path in log_files(name, directory):
+        log.trace("Reading %s backward", path)
+        for line in reverse_lines(path):
+            if pattern is None or pattern.search(line):
+                found.append(line)
+                if len(found) == num_lines:
+                    return found[::-1]
+    return found[::-1]
+
+
+def compile_filter(text: str) -> t.Pattern[str]:
+    """Compile a line filter, a regex if it's wrapped in slashes like `/regex/`.
+
+    Anything else is matched as plain text. Raises `re.error` for bad regexes.
+    """
+    if len(text) >= 2 and text.startswith("/") and text.endswith("/"):
+        return re.compile(text[1:-1])
+    return re.compile(re.escape(text))
+
+
+# `%(asctime)s |` at the start of every log record
+TIMESTAMP_REGEX = re.compile(rb"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) \|")
+# Bytes of log between the lines in a file's index
+INDEX_INTERVAL = 65536
+
+_DURATION_REGEX = re.compile(r"(?:\d+[smhd])+", re.IGNORECASE)
+_DURATION_PART_REGEX = re.compile(r"(\d+)([smhd])", re.IGNORECASE)
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def format_timestamp(when: datetime) -> str:
+    """Format a time the way it's written in the logs."""
+    return f"{when:%Y-%m-%d %H:%M:%S},{when.microsecond // 1000:03d}"
+
+
+def parse_time(text: str, now: t.Optional[datetime] = None) -> datetime:
+    """Parse a time to search the logs from or until, in local time.
+
+    Takes `now`, a time ago like `90s`, `15m` or `1h30m`, a time today like
+    `14:30`, or a date and time like `2021-04-01T14:30`. Raises ValueError
+    for anything else.
+    """
+    now = now or datetime.now()
+    text = text.strip()
+    if text.lower() == "now":
+        return now
+
+    if _DURATION_REGEX.fullmatch(text):
+        seconds = sum(
+            int(amount) * _DURATION_UNITS[unit.lower()]
+            for amount, unit in _DURATION_PART_REGEX.findall(text)
+        )
+        return now - timedelta(seconds=seconds)
+
+    try:
+        return datetime.combine(now.date(), time.fromisoformat(text))
+    except ValueError:
+        return datetime.fromisoformat(text)
+
+
+def _fingerprint(f: t.BinaryIO) -> t.Optional[str]:
+    """Identify a log file by its first line, which stays the same when rotated.
+
+    Returns None if the file doesn't have a whole line yet.
+    """
+    f.seek(0)
+    first_line = f.readline(256)
+    if not first_line.endswith(b"\n") and len(first_line) < 256:
+        return None
+    return hashlib.blake2b(first_line, digest_size=8).hexdigest()
+
+
+class LogIndex:
+    """Finds log lines by time, using a sparse index of where each time starts.
+
+    The index has the time and offset of a line about every `interval` bytes
+    of each log file. It's saved next to the logs and kept up to date as the
+    files grow, and since files are told apart by their first line, it's
+    still right after they're rotated. Only the part of each file around the
+    times being searched for is read.
+    """
+
+    def __init__(
+        self,
+        name: str = "bot.log",
+        directory: Path = LOG_DIR,
+        interval: int = INDEX_INTERVAL,
+    ):
+        self.name = name
+        self.directory = directory
+        self.interval = interval
+        self.path = directory / f".{name}.index.json"
+
+        self._lock = threading.Lock()
+        # Indexed size and (time, offset) entries by file fingerprint
+        self._files: dict[str, dict[str, t.Any]] = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._files = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            log.warning(f"Couldn't load the log index at {self.path}, rebuilding it")
+
+    def search(
+        self,
+        since: datetime,
+        until: datetime,
+        pattern: t.Optional[t.Pattern[str]] = None,
+        limit: int = 1000,
+    ) -> tuple[list[str], bool]:
+        """Get the lines logged between two times, oldest first.
+
+        Lines without a time, like tracebacks, count as logged with the line
+        before them. With a pattern, only lines it matches are included.
+        Returns at most `limit` lines, and whether there were more. This does
+        blocking I/O, so run it in a thread.
+        """
+        start, end = format_timestamp(since), format_timestamp(until)
+        found: list[str] = []
+        with self._lock:
+            files = self._update()
+
+        for path, entries in reversed(files):
+            if entries and entries[0][0] > end:
+                continue  # Everything in the file is too new
+
+            # Start at the last indexed line before the range
+            i = bisect.bisect_left([stamp for stamp, _ in entries], start)
+            offset = entries[i - 1][1] if i > 0 else 0
+            log.trace("Searching %s from byte %d", path, offset)
+
+            for line in _lines_between(path, offset, start, end):
+                if pattern is None or pattern.search(line):
+                    if len(found) == limit:
+                        return found, True
+                    found.append(line)
+        return found, False
+
+    def _update(self) -> list[tuple[Path, list[list]]]:
+        """Index anything new in the log files, newest file first."""
+        files = []
+        fingerprints = set()
+        for path in log_files(self.name, self.directory):
+            try:
+                with open(path, "rb") as f:
+                    fingerprint = _fingerprint(f)
+                    if fingerprint is None:
+                        files.append((path, []))
+                        continue
+
+                    entry = self._files.get(fingerprint)
+                    size = os.fstat(f.fileno()).st_size
+                    if entry is None or entry["size"] > size:
+                        entry = self._files[fingerprint] = {"size": 0, "entries": []}
+                    if entry["size"] < size:
+                        self._index(f, entry)
+            except FileNotFoundError:
+                continue  # Rotated away while reading
+
+            fingerprints.add(fingerprint)
+            files.append((path, entry["entries"]))
+
+        # Forget files that were deleted
+        self._files = {
+            fingerprint: entry
+            for fingerprint, entry in self._files.items()
+            if fingerprint in fingerprints
+        }
+        self._save()
+        return files
+
+    def _index(self, f: t.BinaryIO, entry: dict[str, t.Any]) -> None:
+        """Index the lines of a file after the part that's already indexed."""
+        entries = entry["entries"]
+        offset = entry["size"]
+        last = entries[-1][1] if entries else -self.interval
+
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Still being written
+            if offset - last >= self.interval:
+                match = TIMESTAMP_REGEX.match(line)
+                if match:
+                    entries.append([match.group(1).decode(), offset])
+                    last = offset
+            offset += len(line)
+
+        log.trace("Indexed bytes %d-%d of a log file", entry["size"], offset)
+        entry["size"] = offset
+
+    def _save(self) -> None:
+        """Save the index, replacing the old one all at once."""
+        temp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(self._files, f, separators=(",", ":"))
+            os.replace(temp, self.path)
+        except OSError as e:
+            log.warning(f"Couldn't save the log index: {e}")
+
+
+def _lines_between(path: Path, offset: int, start: str, end: str) -> t.Iterator[str]:
+    """Yield the lines of a file from `offset` logged between two timestamps."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        current = None
+        for line in f:
+            match = TIMESTAMP_REGEX.match(line)
+            if match:
+                current = match.group(1).decode()
+                if current > end:
+                    return
+            if current is not None and current >= start:
+                yield line.rstrip(b"\r\n").decode("utf-8", errors="replace")
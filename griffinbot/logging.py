@@ -1,6 +1,9 @@
+import atexit
 import logging
 import os
+import queue
 import sys
+import typing as t
 from logging import Logger, handlers
 from pathlib import Path
 
@@ -9,6 +12,95 @@
 from griffinbot import constants
 
 TRACE_LEVEL = 5
+# Most records waiting to be written before new ones are dropped
+QUEUE_SIZE = 10000
+# Most trace records a second from each line of code
+TRACE_SAMPLE_RATE = 10
+FORMAT_STRING = "%(asctime)s | %(name)s | %(levelname)s | %(message)s"
+LOG_FILE = Path("logs", "bot.log")
+# Log arguments that can't change before the listener formats them
+_IMMUTABLE_ARGS = (str, bytes, int, float, type(None))
+
+_queue_handler: t.Optional["DroppingQueueHandler"] = None
+_listener: t.Optional[handlers.QueueListener] = None
+
+
+class DroppingQueueHandler(handlers.QueueHandler):
+    """Queue handler that drops records when the queue is full, and counts them.
+
+    Logging never blocks this way, even if writing the logs falls behind.
+    Records are formatted by the listener's thread, not the one logging.
+    """
+
+    def __init__(self, queue: queue.Queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._exception_formatter = logging.Formatter()
+
+    @property
+    def depth(self) -> int:
+        """Number of records waiting to be written."""
+        return self.queue.qsize()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Get a record ready to be formatted later, in another thread.
+
+        Only what could change before then is rendered now: the message, if
+        any of its arguments are mutable, and the traceback.
+        """
+        args = record.args
+        if isinstance(args, dict):
+            args = args.values()
+        if args and not all(isinstance(arg, _IMMUTABLE_ARGS) for arg in args):
+            record.msg = record.getMessage()
+            record.args = None
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exception_formatter.formatException(
+                    record.exc_info
+                )
+            record.exc_info = None  # Don't keep the frames alive
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record, or drop it if the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TraceSampler(logging.Filter):
+    """Lets through at most `rate` trace records a second from each line of code.
+
+    The first record let through after some were skipped says how many.
+    """
+
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = rate
+        # Start of the current second, then records let through and skipped
+        self._lines: dict[tuple[str, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:  # noqa: A003
+        """Check if a record should be logged."""
+        if record.levelno != TRACE_LEVEL:
+            return True
+
+        line = (record.pathname, record.lineno)
+        sample = self._lines.get(line)
+        if sample is None or record.created - sample[0] >= 1:
+            skipped = sample[2] if sample is not None else 0
+            sample = self._lines[line] = [record.created, 0, 0]
+            if skipped:
+                record.msg = f"{record.msg} (skipped {skipped} more like this)"
+
+        if sample[1] >= self.rate:
+            sample[2] += 1
+            return False
+        sample[1] += 1
+        return True
 
 
 def setup() -> None:
@@ -18,19 +110,16 @@ def setup() -> None:
     Logger.trace = _monkeypatch_trace
 
     log_level = TRACE_LEVEL if constants.DEBUG_MODE else logging.INFO
-    format_string = "%(asctime)s | %(name)s | %(levelname)s | %(message)s"
-    log_format = logging.Formatter(format_string)
+    log_format = logging.Formatter(FORMAT_STRING)
 
-    log_file = Path("logs", "bot.log")
-    log_file.parent.mkdir(exist_ok=True)
+    LOG_FILE.parent.mkdir(exist_ok=True)
     file_handler = handlers.RotatingFileHandler(
-        log_file, maxBytes=5242880, backupCount=7, encoding="utf8"
+        LOG_FILE, maxBytes=5242880, backupCount=7, encoding="utf8"
     )
     file_handler.setFormatter(log_format)
 
     root_log = logging.getLogger()
     root_log.setLevel(log_level)
-    root_log.addHandler(file_handler)
 
     if "COLOREDLOGS_LEVEL_STYLES" not in os.environ:
         coloredlogs.DEFAULT_LEVEL_STYLES = {
@@ -41,16 +130,81 @@ def setup() -> None:
         }
 
     if "COLOREDLOGS_LOG_FORMAT" not in os.environ:
-        coloredlogs.DEFAULT_LOG_FORMAT = format_string
+        coloredlogs.DEFAULT_LOG_FORMAT = FORMAT_STRING
 
     if "COLOREDLOGS_LOG_LEVEL" not in os.environ:
         coloredlogs.DEFAULT_LOG_LEVEL = log_level
 
-    coloredlogs.install(logger=root_log, stream=sys.stdout)
+    # Let coloredlogs make its handler on a logger of its own, to move it
+    console = Logger("console")
+    coloredlogs.install(logger=console, stream=sys.stdout)
+
+    # Writing is done in a thread, so logging only has to queue the records
+    global _queue_handler, _listener
+    _queue_handler = DroppingQueueHandler(queue.Queue(QUEUE_SIZE))
+    _queue_handler.addFilter(TraceSampler(TRACE_SAMPLE_RATE))
+    _listener = handlers.QueueListener(
+        _queue_handler.queue,
+        file_handler,
+        *console.handlers,
+        respect_handler_level=True,
+    )
+    root_log.addHandler(_queue_handler)
+    _listener.start()
+    atexit.register(stop)
 
     logging.getLogger("discord").setLevel(logging.WARNING)
 
 
+def stop() -> None:
+    """Write the records that are queued, and log directly from then on."""
+    global _queue_handler, _listener
+    if _listener is None:
+        return
+
+    _listener.stop()
+    root_log = logging.getLogger()
+    root_log.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        root_log.addHandler(handler)
+    _queue_handler = _listener = None
+
+
+def setup_worker() -> None:
+    """Set up logging in a worker process, writing records straight out.
+
+    Forked workers inherit the queue handler, but nothing in them would write
+    out what it queues. Pass this as the `initializer` of process pools.
+    """
+    global _queue_handler, _listener
+    _queue_handler = _listener = None
+
+    log_format = logging.Formatter(FORMAT_STRING)
+    sampler = TraceSampler(TRACE_SAMPLE_RATE)
+    root_log = logging.getLogger()
+    for handler in root_log.handlers[:]:
+        root_log.removeHandler(handler)
+
+    # The parent rotates the file, so reopen it when that happens
+    for handler in (
+        handlers.WatchedFileHandler(LOG_FILE, encoding="utf8"),
+        logging.StreamHandler(sys.stdout),
+    ):
+        handler.setFormatter(log_format)
+        handler.addFilter(sampler)
+        root_log.addHandler(handler)
+
+
+def queue_depth() -> int:
+    """Get the number of log records waiting to be written."""
+    return _queue_handler.depth if _queue_handler is not None else 0
+
+
+def dropped_records() -> int:
+    """Get the number of log records dropped because the queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
 def _monkeypatch_trace(self: logging.Logger, msg: str, *args, **kwargs) -> None:
     """
     Log 'msg % args' with severity 'TRACE'.
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import abc
+import bisect
+import contextlib
+import logging
+import math
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+# Histogram buckets for things that take about a second, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Histogram buckets for things that take about a millisecond, in seconds
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+Labels = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    """Format a number the way Prometheus expects."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    """Format the labels of a sample, like `{command="ping"}`."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric(abc.ABC):
+    """A named value, or a value for each combination of its labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Labels = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+
+    def _key(self, labels: dict[str, str]) -> Labels:
+        """Get the label values to store a sample under."""
+        if labels.keys() != set(self.labels):
+            raise ValueError(f"{self.name} needs the labels {self.labels}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    @abc.abstractmethod
+    def samples(self) -> t.Iterator[tuple[str, str, float]]:
+        """Yield the name, formatted labels and value of every sample."""
+
+    def render(self) -> str:
+        """Render the metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """A count that only goes up, like the number of commands run."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Labels = ()):
+        super().__init__(name, description, labels)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Add to the count with the given labels."""
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> t.Iterator[tuple[str, str, float]]:
+        """Yield the count for every combination of labels."""
+        for key, value in self.values.items():
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Gauge(Metric):
+    """A value that goes up and down, like the number of games being played.
+
+    The value can be set, or read from a function whenever it's collected.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self.value = 0.0
+        self.function: t.Optional[t.Callable[[], float]] = None
+
+    def set(self, value: float) -> None:  # noqa: A003
+        """Set the value."""
+        self.value = value
+
+    def set_function(self, function: t.Optional[t.Callable[[], float]]) -> None:
+        """Read the value from a function, or stop with None."""
+        self.function = function
+
+    def get(self) -> float:
+        """Get the current value."""
+        return self.function() if self.function is not None else self.value
+
+    def samples(self) -> t.Iterator[tuple[str, str, float]]:
+        """Yield the current value."""
+        yield self.name, "", self.get()
+
+
+class _Observations:
+    """Counts of the values observed in each bucket, and their total."""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(Metric):
+    """Counts how many observed values fall in each bucket, like latencies.
+
+    Buckets are upper bounds, and a value goes in the first bucket it fits
+    in. Values bigger than every bucket are only counted in the total.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Labels = (),
+        buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.values: dict[Labels, _Observations] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Observe a value with the given labels."""
+        key = self._key(labels)
+        observations = self.values.get(key)
+        if observations is None:
+            observations = self.values[key] = _Observations(len(self.buckets))
+
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            observations.counts[i] += 1
+        observations.count += 1
+        observations.sum += value
+
+    @contextlib.contextmanager
+    def time(self, **labels: str) -> t.Iterator[None]:
+        """Observe how many seconds the code in the `with` block takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Get how many values were observed with the given labels."""
+        observations = self.values.get(self._key(labels))
+        return observations.count if observations is not None else 0
+
+    def mean(self, **labels: str) -> t.Optional[float]:
+        """Get the mean of the values observed with the given labels."""
+        observations = self.values.get(self._key(labels))
+        if observations is None or observations.count == 0:
+            return None
+        return observations.sum / observations.count
+
+    def quantile(self, q: float, **labels: str) -> t.Optional[float]:
+        """Get the bucket the `q` quantile of the observed values is in.
+
+        Returns the bucket's upper bound, or infinity if it's past every bucket.
+        """
+        observations = self.values.get(self._key(labels))
+        if observations is None or observations.count == 0:
+            return None
+
+        rank = q * observations.count
+        seen = 0
+        for bound, count in zip(self.buckets, observations.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def samples(self) -> t.Iterator[tuple[str, str, float]]:
+        """Yield the cumulative bucket counts, sum and count for every label."""
+        for key, observations in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, observations.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield (
+                    f"{self.name}_bucket",
+                    _format_labels(self.labels, key, le),
+                    cumulative,
+                )
+            yield (
+                f"{self.name}_bucket",
+                _format_labels(self.labels, key, 'le="+Inf"'),
+                observations.count,
+            )
+            labels = _format_labels(self.labels, key)
+            yield f"{self.name}_sum", labels, observations.sum
+            yield f"{self.name}_count", labels, observations.count
+
+
+MetricType = t.TypeVar("MetricType", bound=Metric)
+
+
+class Registry:
+    """Every metric of the bot, by name.
+
+    Getting a metric that already exists returns it, so reloading an extension
+    keeps the values it had. Metrics are only meant to be used from the event
+    loop thread.
+    """
+
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def counter(self, name: str, description: str, labels: Labels = ()) -> Counter:
+        """Get or make a counter."""
+        return self._get(Counter, name, description, labels=labels)
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        """Get or make a gauge."""
+        return self._get(Gauge, name, description)
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labels: Labels = (),
+        buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get or make a histogram."""
+        return self._get(Histogram, name, description, labels=labels, buckets=buckets)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        return "".join(metric.render() for metric in self.metrics.values())
+
+    def _get(
+        self, kind: type[MetricType], name: str, description: str, **kwargs: object
+    ) -> MetricType:
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = kind(name, description, **kwargs)
+            log.trace("Registered the %s metric %s", metric.kind, name)
+        elif not isinstance(metric, kind):
+            raise ValueError(f"{name} is already a {metric.kind}")
+        return metric
+
+
+# The registry the bot's metrics are in
+registry = Registry()
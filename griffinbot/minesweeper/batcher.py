@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+Item = t.TypeVar("Item")
+
+
+class UpdateBatcher(t.Generic[Item]):
+    """Collects items and hands them to `flush` in batches.
+
+    Batches are flushed at most once every `interval` seconds, so any items
+    added while waiting or while a batch is being flushed go in the next
+    batch. Every item is flushed exactly once, in the order it was added.
+    """
+
+    def __init__(
+        self, flush: t.Callable[[list[Item]], t.Awaitable[None]], interval: float
+    ):
+        self._flush = flush
+        self.interval = interval
+
+        self._pending: list[tuple[Item, asyncio.Future]] = []
+        self._task: t.Optional[asyncio.Task] = None
+        self._last_flush = float("-inf")
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, item: Item) -> asyncio.Future:
+        """Add an item to the next batch.
+
+        Returns a future that's done once the item has been flushed, with the
+        exception `flush` raised if it failed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return future
+
+    def close(self) -> None:
+        """Stop flushing, cancelling the futures of the items that are left."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+
+    async def _run(self) -> None:
+        """Flush batches until there's nothing left to flush."""
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending:
+                delay = self._last_flush + self.interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                batch, self._pending = self._pending, []
+                self._last_flush = loop.time()
+                log.trace("Flushing a batch of %d updates", len(batch))
+                try:
+                    await self._flush([item for item, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_result(None)
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
@@ -0,0 +1,507 @@
+from __future__ import annotations
+
+import logging
+import random
+import struct
+import sys
+import typing as t
+import zlib
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+
+from griffinbot.constants import DEBUG_MODE
+
+log = logging.getLogger(__name__)
+
+# Values stored in the `flags` plane
+UNMARKED = 0
+FLAGGED = 1
+UNKNOWN = 2
+# Move actions for digging a cell and placing the bombs around a safe cell,
+# the other actions are flag states
+DIG = -1
+START = -2
+
+# Encoding format version, board width, height, number of bombs and state bits
+_HEADER = struct.Struct("<BHHIB")
+_STARTED = 1
+_GAMEOVER = 2
+_SAFE_ZONE = 4
+# Version 1 stores every cell, version 2 the seed and move log
+_CELLS_FORMAT = 1
+_REPLAY_FORMAT = 2
+_SEED = struct.Struct("<Q")
+
+# Moves are logged as varints of the cell index shifted left by 3, ORed with
+# the action code
+_ACTION_CODES = {DIG: 0, START: 1, UNMARKED: 2, FLAGGED: 3, UNKNOWN: 4}
+_CODE_ACTIONS = {code: action for action, code in _ACTION_CODES.items()}
+
+_ADJACENT_OFFSETS = (
+    (1, -1),
+    (1, 0),
+    (1, 1),
+    (0, 1),
+    (-1, 1),
+    (-1, 0),
+    (-1, -1),
+    (0, -1),
+)
+
+
+@lru_cache(maxsize=64)
+def neighbor_table(width: int, height: int) -> tuple[tuple[int, ...], ...]:
+    """Get the indices adjacent to every cell of a `width` by `height` board.
+
+    Tables are cached, so every board of the same size shares one table.
+    """
+    table = []
+    for y in range(height):
+        for x in range(width):
+            table.append(
+                tuple(
+                    (y + dy) * width + x + dx
+                    for dx, dy in _ADJACENT_OFFSETS
+                    if 0 <= x + dx < width and 0 <= y + dy < height
+                )
+            )
+    return tuple(table)
+
+
+def decode_moves(log: bytes) -> t.Iterator[tuple[int, int]]:
+    """Decode a move log into (index, action) moves.
+
+    Raises `ValueError` if the log is corrupt.
+    """
+    value = 0
+    shift = 0
+    for byte in log:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte & 0x80:
+            continue
+
+        action = _CODE_ACTIONS.get(value & 7)
+        if action is None:
+            raise ValueError(f"Unknown move action code {value & 7}")
+        yield value >> 3, action
+        value = 0
+        shift = 0
+
+    if shift:
+        raise ValueError("Move log ends in the middle of a move")
+
+
+class Board:
+    """Compact Minesweeper board state.
+
+    Every cell property lives in its own flat `bytearray` plane, indexed by
+    `y * width + x`, so a board costs a few bytes per cell instead of a
+    Python object per cell.
+
+    Bombs are placed with a random generator seeded by `seed`, and every move
+    is appended to the `moves` log, so the board can be rebuilt with `replay`.
+    Boards loaded from the old cell format have no move log.
+
+    With `safe_zone`, the cells around the first click are kept free of bombs
+    too, as long as there's room for the bombs elsewhere.
+    """
+
+    __slots__ = (
+        "width",
+        "height",
+        "num_bombs",
+        "started",
+        "gameover",
+        "covered",
+        "flags",
+        "bombs",
+        "counts",
+        "covered_safe",
+        "seed",
+        "moves",
+        "safe_zone",
+        "_neighbors",
+    )
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        num_bombs: int,
+        seed: t.Optional[int] = None,
+        safe_zone: bool = False,
+    ):
+        size = width * height
+
+        self.width = width
+        self.height = height
+        self.num_bombs = num_bombs
+        self.started = False
+        self.gameover = False
+        self.safe_zone = safe_zone
+
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        # Varint encoded moves, see `decode_moves`
+        self.moves: t.Optional[bytearray] = bytearray()
+
+        self.covered = bytearray(b"\x01") * size  # 1 = covered
+        self.flags = bytearray(size)  # UNMARKED, FLAGGED or UNKNOWN
+        self.bombs = bytearray(size)  # 1 = bomb
+        self.counts = bytearray(size)  # Number of adjacent bombs
+
+        # Safe cells that still need to be uncovered, kept up to date by reveals
+        self.covered_safe = size - num_bombs
+
+        self._neighbors = neighbor_table(width, height)
+
+    def __getstate__(self):
+        # The neighbor table is shared and cheap to look up again
+        return tuple(
+            getattr(self, slot) for slot in self.__slots__ if slot != "_neighbors"
+        )
+
+    def __setstate__(self, state: tuple) -> None:
+        slots = (slot for slot in self.__slots__ if slot != "_neighbors")
+        for slot, value in zip(slots, state):
+            setattr(self, slot, value)
+        self._neighbors = neighbor_table(self.width, self.height)
+
+    def __repr__(self):
+        return (
+            f"<Board {self.width}x{self.height} bombs={self.num_bombs} "
+            + f"started={self.started} gameover={self.gameover}>"
+        )
+
+    @property
+    def size(self) -> int:
+        """Number of cells on the board."""
+        return self.width * self.height
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the board, in bytes."""
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(plane)
+            for plane in (
+                self.covered,
+                self.flags,
+                self.bombs,
+                self.counts,
+                self.moves,
+            )
+        )
+
+    def index(self, x: int, y: int) -> int:
+        """Convert an (x, y) position to a cell index."""
+        return y * self.width + x
+
+    def position(self, index: int) -> tuple[int, int]:
+        """Convert a cell index to an (x, y) position."""
+        y, x = divmod(index, self.width)
+        return x, y
+
+    def neighbors(self, index: int) -> tuple[int, ...]:
+        """Get the indices of the cells adjacent to `index`."""
+        return self._neighbors[index]
+
+    def to_bytes(self) -> bytes:
+        """Encode the board compactly.
+
+        Boards with a move log are stored as their seed and move log, which
+        `from_bytes` replays. Otherwise, each cell is packed into one byte
+        (covered bit, 2 flag bits, bomb bit and 4 count bits), then the cells
+        are compressed.
+        """
+        state = self._state_bits()
+        if self.moves is not None:
+            header = _HEADER.pack(
+                _REPLAY_FORMAT, self.width, self.height, self.num_bombs, state
+            )
+            return header + _SEED.pack(self.seed) + self.moves
+
+        header = _HEADER.pack(
+            _CELLS_FORMAT, self.width, self.height, self.num_bombs, state
+        )
+        cells = bytes(
+            covered | flag << 1 | bomb << 3 | count << 4
+            for covered, flag, bomb, count in zip(
+                self.covered, self.flags, self.bombs, self.counts
+            )
+        )
+        return header + zlib.compress(cells)
+
+    @staticmethod
+    def from_bytes(data: bytes) -> Board:
+        """Decode a board encoded with `to_bytes`."""
+        try:
+            version, width, height, num_bombs, state = _HEADER.unpack_from(data)
+            if version == _REPLAY_FORMAT:
+                (seed,) = _SEED.unpack_from(data, _HEADER.size)
+            elif version == _CELLS_FORMAT:
+                cells = zlib.decompress(data[_HEADER.size :])
+            else:
+                raise ValueError(f"Unknown board format version {version}")
+        except (struct.error, zlib.error) as e:
+            raise ValueError("Invalid board data") from e
+
+        if version == _REPLAY_FORMAT:
+            board = Board.replay(
+                width,
+                height,
+                num_bombs,
+                seed,
+                data[_HEADER.size + _SEED.size :],
+                safe_zone=bool(state & _SAFE_ZONE),
+            )
+            if state != board._state_bits():
+                raise ValueError("Board state doesn't match its move log")
+            return board
+
+        if len(cells) != width * height:
+            raise ValueError("Board data doesn't match its dimensions")
+
+        board = Board(width, height, num_bombs, safe_zone=bool(state & _SAFE_ZONE))
+        board.moves = None
+        board.started = bool(state & _STARTED)
+        board.gameover = bool(state & _GAMEOVER)
+        board.covered = bytearray(cell & 1 for cell in cells)
+        board.flags = bytearray(cell >> 1 & 3 for cell in cells)
+        board.bombs = bytearray(cell >> 3 & 1 for cell in cells)
+        board.counts = bytearray(cell >> 4 for cell in cells)
+        if board.started:
+            board.covered_safe = sum(
+                1
+                for covered, bomb in zip(board.covered, board.bombs)
+                if covered and not bomb
+            )
+        return board
+
+    @staticmethod
+    def replay(
+        width: int,
+        height: int,
+        num_bombs: int,
+        seed: int,
+        moves: bytes,
+        limit: t.Optional[int] = None,
+        safe_zone: bool = False,
+    ) -> Board:
+        """Rebuild a board from its seed and move log.
+
+        Only the first `limit` moves are replayed, if it's given. Raises
+        `ValueError` if the move log is corrupt or doesn't fit the board.
+        """
+        board = Board(width, height, num_bombs, seed, safe_zone)
+        size = board.size
+        for index, action in islice(decode_moves(moves), limit):
+            if not 0 <= index < size:
+                raise ValueError(f"Move at {index} is off the board")
+            if action == START:
+                board.start(index)
+            else:
+                board.play(((index, action),))
+        return board
+
+    def copy(self) -> Board:
+        """Make an independent copy of the board."""
+        board = Board(
+            self.width, self.height, self.num_bombs, self.seed, self.safe_zone
+        )
+        board.started = self.started
+        board.gameover = self.gameover
+        board.covered[:] = self.covered
+        board.flags[:] = self.flags
+        board.bombs[:] = self.bombs
+        board.counts[:] = self.counts
+        board.covered_safe = self.covered_safe
+        board.moves = None if self.moves is None else self.moves[:]
+        return board
+
+    def start(self, index: int) -> None:
+        """Place the bombs using the seed, keeping the cell at `index` safe."""
+        self._log(index, START)
+        self._start(index)
+
+    def _start(self, index: int) -> None:
+        self.place_bombs(self._sample_bombs(index))
+
+    def _sample_bombs(self, index: int) -> set[int]:
+        """Pick the bomb cells, leaving out the cell at `index` and its safe zone.
+
+        Uses Floyd's sampling algorithm, so it takes time and memory in
+        proportion to the number of bombs rather than the board size.
+        """
+        excluded = [index]
+        zone = self._neighbors[index]
+        if self.safe_zone and self.size - 1 - len(zone) >= self.num_bombs:
+            excluded.extend(zone)
+        excluded.sort()
+
+        rng = random.Random(self.seed)
+        open_cells = self.size - len(excluded)
+        picked = set()
+        for j in range(open_cells - self.num_bombs, open_cells):
+            pick = rng.randint(0, j)
+            picked.add(pick if pick not in picked else j)
+
+        # Map the picks from the open cells onto the whole board, skipping
+        # over the excluded cells
+        bombs = set()
+        for pick in picked:
+            bomb = pick
+            for cell in excluded:
+                if cell <= bomb:
+                    bomb += 1
+            bombs.add(bomb)
+        return bombs
+
+    def _state_bits(self) -> int:
+        """Get the state bits to encode the board with."""
+        return (
+            (_STARTED if self.started else 0)
+            | (_GAMEOVER if self.gameover else 0)
+            | (_SAFE_ZONE if self.safe_zone else 0)
+        )
+
+    def _log(self, index: int, action: int) -> None:
+        """Append a move to the move log, as a varint."""
+        if self.moves is None:
+            return
+
+        value = index << 3 | _ACTION_CODES[action]
+        while value > 0x7F:
+            self.moves.append(value & 0x7F | 0x80)
+            value >>= 7
+        self.moves.append(value)
+
+    def place_bombs(self, bombs: t.Iterable[int]) -> None:
+        """Place bombs at the given indices and start the game.
+
+        Each bomb adds one to the counts of its neighbors, so this takes time in
+        proportion to the number of bombs. Bombs placed this way aren't in the
+        move log, use `start` for boards that need to be replayed.
+        """
+        for bomb in bombs:
+            self.bombs[bomb] = 1
+            for neighbor in self._neighbors[bomb]:
+                self.counts[neighbor] += 1
+
+        # Mark the game as started
+        self.started = True
+
+    def reveal(self, index: int) -> set[int]:
+        """Uncover a cell, flood-filling outwards from cells with no adjacent bombs.
+
+        Returns the indices of every cell that was uncovered.
+        """
+        covered = self.covered
+        flags = self.flags
+        bombs = self.bombs
+        counts = self.counts
+        neighbors = self._neighbors
+
+        revealed = set()
+        if covered[index]:
+            covered[index] = 0
+            revealed.add(index)
+            if not bombs[index]:
+                self.covered_safe -= 1
+
+        queue = deque((index,))
+        while queue:
+            cell = queue.popleft()
+            if bombs[cell] or counts[cell]:
+                continue
+
+            for neighbor in neighbors[cell]:
+                if covered[neighbor] and flags[neighbor] == UNMARKED:
+                    covered[neighbor] = 0
+                    revealed.add(neighbor)
+                    queue.append(neighbor)
+
+                    # Neighbors of an empty cell are never bombs
+                    self.covered_safe -= 1
+
+        return revealed
+
+    def reveal_all(self) -> None:
+        """Uncover every cell on the board."""
+        self.covered[:] = bytes(self.size)
+        self.covered_safe = 0
+
+    def dig(self, index: int) -> set[int]:
+        """Dig the cell at `index`, ending the game if needed.
+
+        Returns the indices of every cell that was uncovered.
+        """
+        if self.gameover:
+            return set()  # the game is over
+
+        self._log(index, DIG)
+        if self.flags[index] != UNMARKED:
+            return set()  # flag or ?
+        elif not self.started:  # start the game, the dig implies the start
+            self._start(index)
+            revealed = self.reveal(index)
+        elif self.bombs[index]:  # game over
+            self.gameover = True
+            return set()
+        else:  # all good
+            revealed = self.reveal(index)
+
+        if self.cleared():
+            self.gameover = True
+        return revealed
+
+    def mark(self, index: int, state: int) -> None:
+        """Set the flag state of a covered cell."""
+        if self.gameover:
+            return
+        self._log(index, state)
+        self.flags[index] = state
+
+    def play(self, moves: t.Iterable[tuple[int, int]]) -> set[int]:
+        """Apply (index, action) moves in order, stopping once the game is over.
+
+        Actions are `DIG` or the flag state to mark the cell with. Returns the
+        indices of every cell that changed.
+        """
+        changed = set()
+        if self.gameover:
+            return changed
+
+        # Stop right after the losing move, without consuming any more moves
+        for index, action in moves:
+            if action == DIG:
+                changed.update(self.dig(index))
+            else:
+                self.mark(index, action)
+                changed.add(index)
+
+            if self.gameover:
+                break
+        return changed
+
+    def cleared(self) -> bool:
+        """Check if the player has cleared the board of mines."""
+        if DEBUG_MODE:
+            self.check_covered_safe()
+        return self.covered_safe == 0
+
+    def check_covered_safe(self) -> bool:
+        """Check the covered safe cell counter against a scan of the board."""
+        if not self.started:
+            return True  # The bombs haven't been placed yet
+
+        scanned = sum(
+            1 for covered, bomb in zip(self.covered, self.bombs) if covered and not bomb
+        )
+        if scanned != self.covered_safe:
+            log.error(
+                f"Covered safe cell counter is {self.covered_safe}, "
+                + f"but {scanned} safe cells are covered on {self!r}"
+            )
+            return False
+        return True
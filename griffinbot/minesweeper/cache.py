@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import logging
+import time
+import typing as t
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+
+class Sized(t.Protocol):
+    """Something that knows how much memory it uses."""
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used, in bytes."""
+        ...
+
+
+Key = t.Hashable
+Game = t.TypeVar("Game", bound=Sized)
+
+
+class GameCache(t.Generic[Game]):
+    """Live games, ordered from least to most recently used.
+
+    Games idle for longer than `ttl` seconds are removed by `expire`, which
+    only looks at the games that actually expired since they are always at
+    the front. Once there are more than `max_games` games or they use more
+    than `max_bytes` bytes, the least recently used games are evicted and
+    passed to `on_evict`. Games grow as they're played, so a game's size is
+    measured again whenever it's used.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_games: int,
+        max_bytes: int,
+        on_evict: t.Optional[t.Callable[[Key, Game], None]] = None,
+    ):
+        self.ttl = ttl
+        self.max_games = max_games
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.nbytes = 0
+
+        # Game, last activity time and the size it's counted as, by key
+        self._games: OrderedDict[Key, tuple[Game, float, int]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._games)
+
+    def __contains__(self, key: Key):
+        return key in self._games
+
+    def __getitem__(self, key: Key) -> Game:
+        game = self.get(key)
+        if game is None:
+            raise KeyError(key)
+        return game
+
+    def __setitem__(self, key: Key, game: Game) -> None:
+        self.pop(key)
+        nbytes = game.nbytes
+        self._games[key] = (game, time.monotonic(), nbytes)
+        self.nbytes += nbytes
+        self._enforce_limits()
+
+    def __delitem__(self, key: Key) -> None:
+        _, _, nbytes = self._games.pop(key)
+        self.nbytes -= nbytes
+
+    def items(self) -> t.Iterator[tuple[Key, Game]]:
+        """Iterate over the keys and games, least recently used first."""
+        for key, (game, _, _) in self._games.items():
+            yield key, game
+
+    def get(self, key: Key) -> t.Optional[Game]:
+        """Get a game, marking it as recently used and measuring it again."""
+        entry = self._games.get(key)
+        if entry is None:
+            return None
+
+        game, _, counted = entry
+        nbytes = game.nbytes
+        self._games[key] = (game, time.monotonic(), nbytes)
+        self._games.move_to_end(key)
+        self.nbytes += nbytes - counted
+        if nbytes > counted:
+            self._enforce_limits()
+        return game
+
+    def pop(self, key: Key) -> t.Optional[Game]:
+        """Remove and return a game, if there is one."""
+        if key not in self._games:
+            return None
+        game, _, _ = self._games[key]
+        del self[key]
+        return game
+
+    def expire(self) -> list[tuple[Key, Game]]:
+        """Remove and return the games that have been idle for too long."""
+        cutoff = time.monotonic() - self.ttl
+        expired = []
+        while self._games:
+            key, (game, last_active, _) = next(iter(self._games.items()))
+            if last_active > cutoff:
+                break
+
+            del self[key]
+            expired.append((key, game))
+        return expired
+
+    def _enforce_limits(self) -> None:
+        """Evict the least recently used games until the cache fits its limits."""
+        # Never evict the game that was just used
+        while len(self._games) > 1 and (
+            len(self._games) > self.max_games or self.nbytes > self.max_bytes
+        ):
+            key, (game, _, _) = next(iter(self._games.items()))
+            del self[key]
+            log.debug("Evicted the Minesweeper game of %s", key)
+
+            if self.on_evict is not None:
+                self.on_evict(key, game)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import typing as t
+from collections import OrderedDict, deque
+
+log = logging.getLogger(__name__)
+
+Key = t.Hashable
+Item = t.TypeVar("Item")
+
+
+class BoardPool(t.Generic[Item]):
+    """Keeps pre-generated boards ready for the most popular board sizes.
+
+    Prefilled keys (usually the board dimensions), and keys requested
+    `min_requests` times, get a queue of up to `depth` boards made by
+    `factory`, which is refilled in the background. Other keys aren't
+    pooled, so one-off sizes don't take up the generator. Once more than
+    `max_sizes` keys are pooled, the least recently used one is dropped.
+    """
+
+    def __init__(
+        self,
+        factory: t.Callable[[Key], t.Awaitable[Item]],
+        depth: int,
+        max_sizes: int,
+        min_requests: int = 3,
+    ):
+        self._factory = factory
+        self.depth = depth
+        self.max_sizes = max_sizes
+        self.min_requests = min_requests
+
+        self._boards: OrderedDict[Key, deque[Item]] = OrderedDict()
+        self._refills: dict[Key, asyncio.Task] = {}
+        # Times keys that aren't pooled were requested, least recent first
+        self._requests: OrderedDict[Key, int] = OrderedDict()
+
+    def __len__(self):
+        return sum(len(boards) for boards in self._boards.values())
+
+    def get(self, key: Key) -> t.Optional[Item]:
+        """Take a board from the pool, or None if none are ready yet."""
+        board = None
+        if key in self._boards:
+            boards = self._use(key)
+            board = boards.popleft() if boards else None
+            self._refill(key)
+        elif self._count_request(key) >= self.min_requests:
+            log.debug("Pooling boards for %s", key)
+            del self._requests[key]
+            self.prefill(key)
+
+        log.trace("Board pool %s: %s", "hit" if board is not None else "miss", key)
+        return board
+
+    def prefill(self, key: Key) -> None:
+        """Start filling the pool for `key`."""
+        self._use(key)
+        self._refill(key)
+
+    def close(self) -> None:
+        """Stop filling the pool and drop every board."""
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
+        self._boards.clear()
+
+    def _count_request(self, key: Key) -> int:
+        """Count a request for a key that isn't pooled, returning the total."""
+        count = self._requests.pop(key, 0) + 1
+        self._requests[key] = count
+        while len(self._requests) > self.max_sizes:
+            self._requests.popitem(last=False)
+        return count
+
+    def _use(self, key: Key) -> deque[Item]:
+        """Mark `key` as recently used, evicting the least recently used key."""
+        if key in self._boards:
+            self._boards.move_to_end(key)
+            return self._boards[key]
+
+        boards = self._boards[key] = deque()
+        while len(self._boards) > self.max_sizes:
+            evicted, _ = self._boards.popitem(last=False)
+            task = self._refills.pop(evicted, None)
+            if task is not None:
+                task.cancel()
+            log.debug("Evicted %s from the board pool", evicted)
+        return boards
+
+    def _refill(self, key: Key) -> None:
+        """Top the pool for `key` up in the background."""
+        if key not in self._refills:
+            self._refills[key] = asyncio.create_task(self._fill(key))
+
+    async def _fill(self, key: Key) -> None:
+        """Generate boards for `key` until its queue is full."""
+        try:
+            while True:
+                boards = self._boards.get(key)
+                if boards is None or len(boards) >= self.depth:
+                    return
+
+                board = await self._factory(key)
+                # The key might have been evicted while generating
+                boards = self._boards.get(key)
+                if boards is not None:
+                    boards.append(board)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception(f"Failed to fill the board pool for {key}")
+        finally:
+            if self._refills.get(key) is asyncio.current_task():
+                del self._refills[key]
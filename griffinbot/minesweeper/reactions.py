@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+
+class _Waiter(t.NamedTuple):
+    user_id: int
+    emojis: t.Collection[str]
+    future: asyncio.Future
+    deadline: float
+
+
+class ReactionRouter:
+    """Routes reactions to the coroutines waiting on them, by message ID.
+
+    Feed it every reaction with `dispatch`, which is O(1) however many
+    coroutines are waiting. Timeouts are kept in one heap and handled by a
+    single timer for the earliest deadline.
+    """
+
+    def __init__(self):
+        self._waiters: dict[int, _Waiter] = {}
+        self._deadlines: list[tuple[float, int]] = []
+        self._timer: t.Optional[asyncio.TimerHandle] = None
+
+    def __len__(self):
+        return len(self._waiters)
+
+    async def wait_for(
+        self,
+        message_id: int,
+        user_id: int,
+        emojis: t.Collection[str],
+        timeout: float,
+    ) -> t.Optional[str]:
+        """Wait for `user_id` to react to `message_id` with one of `emojis`.
+
+        Returns the emoji, or raises `asyncio.TimeoutError` after `timeout`
+        seconds. Waiting again on the same message replaces the old waiter,
+        which returns None.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = loop.time() + timeout
+
+        previous = self._waiters.get(message_id)
+        if previous is not None and not previous.future.done():
+            previous.future.set_result(None)
+        self._waiters[message_id] = _Waiter(user_id, emojis, future, deadline)
+
+        heapq.heappush(self._deadlines, (deadline, message_id))
+        self._schedule(loop)
+
+        try:
+            return await future
+        finally:
+            waiter = self._waiters.get(message_id)
+            if waiter is not None and waiter.future is future:
+                del self._waiters[message_id]
+
+    def dispatch(self, message_id: int, user_id: int, emoji: str) -> bool:
+        """Hand a reaction to whoever is waiting on it.
+
+        Returns whether anything was waiting for the reaction.
+        """
+        waiter = self._waiters.get(message_id)
+        if (
+            waiter is None
+            or waiter.user_id != user_id
+            or emoji not in waiter.emojis
+            or waiter.future.done()
+        ):
+            return False
+
+        del self._waiters[message_id]
+        waiter.future.set_result(emoji)
+        return True
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Make sure the timer fires at the earliest deadline."""
+        if not self._deadlines:
+            return
+
+        earliest, _ = self._deadlines[0]
+        if self._timer is not None:
+            if self._timer.when() <= earliest:
+                return
+            self._timer.cancel()
+        self._timer = loop.call_at(earliest, self._expire, loop)
+
+    def _expire(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Time out every waiter whose deadline has passed."""
+        self._timer = None
+        now = loop.time()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, message_id = heapq.heappop(self._deadlines)
+
+            # The waiter might have gotten a reaction or been replaced
+            waiter = self._waiters.get(message_id)
+            if waiter is None or waiter.deadline != deadline:
+                continue
+
+            del self._waiters[message_id]
+            if not waiter.future.done():
+                waiter.future.set_exception(asyncio.TimeoutError())
+
+        self._schedule(loop)
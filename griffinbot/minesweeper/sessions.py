@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import typing as t
+
+from griffinbot.minesweeper.cache import GameCache, Sized
+
+log = logging.getLogger(__name__)
+
+Game = t.TypeVar("Game", bound=Sized)
+
+
+def store_key(guild_id: int, channel_id: int, user_id: int) -> str:
+    """Get the key the game of a user in a channel is saved as.
+
+    It leaves out the game ID, since a user has one game per channel.
+    """
+    return f"{guild_id}:{channel_id}:{user_id}"
+
+
+class SessionKey(t.NamedTuple):
+    """Where a game is being played, and which game it is."""
+
+    guild_id: int  # 0 in DMs
+    channel_id: int
+    user_id: int
+    game_id: int
+
+    @property
+    def place(self) -> tuple[int, int]:
+        """The guild and channel the game is in."""
+        return self.guild_id, self.channel_id
+
+    @property
+    def store_key(self) -> str:
+        """The key the game is saved as, see `store_key`."""
+        return store_key(self.guild_id, self.channel_id, self.user_id)
+
+
+class Session(t.Generic[Game]):
+    """A game being played, and the lock to hold while changing it.
+
+    Once `ended` is set the game is gone, so check it after getting the lock.
+    """
+
+    __slots__ = ("key", "game", "lock", "ended")
+
+    def __init__(self, key: SessionKey, game: Game):
+        self.key = key
+        self.game = game
+        self.lock = asyncio.Lock()
+        self.ended = False
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the game, in bytes."""
+        return self.game.nbytes
+
+
+class SessionManager(t.Generic[Game]):
+    """Keeps track of the game every user is playing in every channel.
+
+    Sessions live in a `GameCache`, so idle sessions expire and the least
+    recently used ones are evicted. Every user's sessions are also indexed by
+    channel, so finding them doesn't mean searching every session.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_games: int,
+        max_bytes: int,
+        on_evict: t.Optional[t.Callable[[SessionKey, Game], None]] = None,
+    ):
+        self.on_evict = on_evict
+
+        self._sessions: GameCache[Session[Game]] = GameCache(
+            ttl, max_games, max_bytes, on_evict=self._evicted
+        )
+        # Session keys by user ID, then guild and channel
+        self._by_user: dict[int, dict[tuple[int, int], SessionKey]] = {}
+        self._game_ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by all the games, in bytes."""
+        return self._sessions.nbytes
+
+    def items(self) -> t.Iterator[tuple[SessionKey, Game]]:
+        """Iterate over the session keys and games, least recently used first."""
+        for key, session in self._sessions.items():
+            yield key, session.game
+
+    def get(self, guild_id: int, channel_id: int, user_id: int) -> t.Optional[Session]:
+        """Get the session of a user in a channel, marking it as recently used."""
+        key = self._by_user.get(user_id, {}).get((guild_id, channel_id))
+        if key is None:
+            return None
+        return self._sessions.get(key)
+
+    def start(
+        self, guild_id: int, channel_id: int, user_id: int, game: Game
+    ) -> Session[Game]:
+        """Start a session for a new game, ending the user's game in the channel."""
+        old = self.get(guild_id, channel_id, user_id)
+        if old is not None:
+            self.end(old)
+
+        key = SessionKey(guild_id, channel_id, user_id, next(self._game_ids))
+        session = Session(key, game)
+        self._by_user.setdefault(user_id, {})[key.place] = key
+        self._sessions[key] = session
+        return session
+
+    def end(self, session: Session[Game]) -> bool:
+        """End a session, returning whether it was still going."""
+        if session.ended:
+            return False
+
+        self._remove(session)
+        self._sessions.pop(session.key)
+        return True
+
+    def expire(self) -> list[SessionKey]:
+        """End the sessions that have been idle for too long."""
+        expired = self._sessions.expire()
+        for _, session in expired:
+            self._remove(session)
+        return [key for key, _ in expired]
+
+    def _remove(self, session: Session[Game]) -> None:
+        """Mark a session as ended and take it out of the user index."""
+        session.ended = True
+        key = session.key
+        places = self._by_user.get(key.user_id)
+        if places is not None and places.get(key.place) == key:
+            del places[key.place]
+            if not places:
+                del self._by_user[key.user_id]
+
+    def _evicted(self, key: SessionKey, session: Session[Game]) -> None:
+        self._remove(session)
+        if self.on_evict is not None:
+            self.on_evict(key, session.game)
@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import logging
+import random
+import time
+import typing as t
+from collections import defaultdict
+from math import comb
+
+from griffinbot.minesweeper.board import Board
+
+log = logging.getLogger(__name__)
+
+# How long to look for a no-guess board before giving up, in seconds
+SOLVABLE_TIME_BUDGET = 5.0
+# How long to look for a hint before giving up, in seconds
+HINT_TIME_BUDGET = 3.0
+
+Constraint = tuple[frozenset[int], int]
+
+
+def build_constraints(
+    board: Board, frontier: set[int], mines: set[int]
+) -> tuple[list[Constraint], set[int], set[int]]:
+    """Turn the revealed numbers in `frontier` into constraints.
+
+    Every constraint is a set of covered cells and how many mines are among
+    them. Constraints that are trivially all safe or all mines are returned
+    as safe cells and mines instead. Frontier cells with no covered
+    neighbors left are removed from `frontier`.
+    """
+    covered = board.covered
+    counts = board.counts
+
+    constraints = []
+    safe = set()
+    found_mines = set()
+    for cell in list(frontier):
+        unknown = []
+        remaining = counts[cell]
+        for neighbor in board.neighbors(cell):
+            if neighbor in mines:
+                remaining -= 1
+            elif covered[neighbor]:
+                unknown.append(neighbor)
+
+        if not unknown:
+            frontier.discard(cell)
+        elif remaining == 0:
+            safe.update(unknown)
+        elif remaining == len(unknown):
+            found_mines.update(unknown)
+        else:
+            constraints.append((frozenset(unknown), remaining))
+
+    return constraints, safe, found_mines
+
+
+def _subset_rule(constraints: list[Constraint]) -> tuple[set[int], set[int]]:
+    """Deduce cells from constraints that are subsets of other constraints."""
+    by_cell = defaultdict(list)
+    for i, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            by_cell[cell].append(i)
+
+    safe = set()
+    found_mines = set()
+    for cells, remaining in constraints:
+        overlapping = {j for cell in cells for j in by_cell[cell]}
+        for j in overlapping:
+            other_cells, other_remaining = constraints[j]
+            if not cells < other_cells:
+                continue
+
+            difference = other_cells - cells
+            difference_mines = other_remaining - remaining
+            if difference_mines == 0:
+                safe.update(difference)
+            elif difference_mines == len(difference):
+                found_mines.update(difference)
+
+    return safe, found_mines
+
+
+def _global_rule(board: Board, mines: set[int]) -> tuple[set[int], set[int]]:
+    """Deduce cells from the total number of mines left on the board."""
+    unknown = {
+        cell
+        for cell, covered in enumerate(board.covered)
+        if covered and cell not in mines
+    }
+    mines_left = board.num_bombs - len(mines)
+
+    if mines_left == 0:
+        return unknown, set()
+    elif mines_left == len(unknown):
+        return set(), unknown
+    return set(), set()
+
+
+def deduce(board: Board, frontier: set[int], mines: set[int]) -> set[int]:
+    """Find covered cells that are certainly safe.
+
+    Only uses what a player can see: which cells are covered and the numbers
+    on the revealed cells in `frontier`. Certain mines are added to `mines`.
+    """
+    while True:
+        constraints, safe, found_mines = build_constraints(board, frontier, mines)
+        if not safe and not found_mines:
+            safe, found_mines = _subset_rule(constraints)
+        if not safe and not found_mines:
+            safe, found_mines = _global_rule(board, mines)
+
+        mines.update(found_mines)
+        if safe or not found_mines:
+            return safe
+        # New mines can make more constraints trivial, so go again
+
+
+def is_solvable(board: Board, start: int) -> bool:
+    """Check if a started board can be cleared from `start` without guessing."""
+    view = board.copy()
+    if view.bombs[start]:
+        return False
+
+    counts = view.counts
+    revealed = view.reveal(start)
+    frontier = {cell for cell in revealed if counts[cell]}
+    mines = set()
+
+    while view.covered_safe:
+        safe = deduce(view, frontier, mines)
+        if not safe:
+            return False
+
+        for cell in safe:
+            if view.covered[cell]:
+                revealed = view.reveal(cell)
+                frontier.update(cell for cell in revealed if counts[cell])
+
+    return True
+
+
+def generate_solvable(
+    width: int,
+    height: int,
+    num_bombs: int,
+    start: int,
+    seed: t.Optional[int] = None,
+    safe_zone: bool = False,
+    time_budget: float = SOLVABLE_TIME_BUDGET,
+) -> tuple[int, bool]:
+    """Generate a board that can be cleared from `start` without guessing.
+
+    Random boards are tried until one is solvable or `time_budget` seconds
+    have passed, in which case the last (unsolvable) board is used. The seed of
+    every board tried comes from `seed`.
+
+    Returns the board seed that places the bombs when the board is started at
+    `start`, and whether the board is solvable. This is CPU heavy, so run it
+    in a process pool.
+    """
+    seeds = random.Random(seed)
+    deadline = time.monotonic() + time_budget
+    attempts = 0
+    while True:
+        board = Board(width, height, num_bombs, seeds.getrandbits(64), safe_zone)
+        board.start(start)
+        attempts += 1
+
+        if is_solvable(board, start):
+            log.debug("Found a solvable board after %d attempts", attempts)
+            return board.seed, True
+        if time.monotonic() >= deadline:
+            log.debug("No solvable board found after %d attempts", attempts)
+            return board.seed, False
+
+
+class HintTimeoutError(Exception):
+    """The hint solver ran out of time."""
+
+
+def _components(constraints: list[Constraint]) -> list[list[Constraint]]:
+    """Split constraints into groups that share no cells with each other."""
+    parent = list(range(len(constraints)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner = {}
+    for i, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            if cell in owner:
+                parent[find(i)] = find(owner[cell])
+            else:
+                owner[cell] = i
+
+    groups = defaultdict(list)
+    for i, constraint in enumerate(constraints):
+        groups[find(i)].append(constraint)
+    return list(groups.values())
+
+
+class _LayoutCounter:
+    """Counts the mine layouts of one component, grouped by number of mines.
+
+    Cells are assigned in order, and partial results are memoized on the
+    mines still needed by every constraint.
+    """
+
+    def __init__(
+        self, cells: list[int], constraints: list[Constraint], deadline: float
+    ):
+        self.cells = cells
+        self.deadline = deadline
+        self.needed = tuple(remaining for _, remaining in constraints)
+
+        positions = {cell: position for position, cell in enumerate(cells)}
+        self.cell_constraints = [[] for _ in cells]
+        for j, (constraint_cells, _) in enumerate(constraints):
+            for cell in constraint_cells:
+                self.cell_constraints[positions[cell]].append(j)
+
+        # Number of cells of each constraint that come after every position
+        self.cells_after = []
+        left = [len(constraint_cells) for constraint_cells, _ in constraints]
+        for position in range(len(cells)):
+            for j in self.cell_constraints[position]:
+                left[j] -= 1
+            self.cells_after.append(tuple(left))
+
+        self.memo = {}
+
+    def count(self) -> dict[int, tuple[int, tuple[int, ...]]]:
+        """Map number of mines to layouts, and layouts with a mine on each cell."""
+        return self._count(0, self.needed)
+
+    def _count(self, position: int, needed: tuple[int, ...]) -> dict:
+        if position == len(self.cells):
+            return {0: (1, ())}
+        key = (position, needed)
+        if key in self.memo:
+            return self.memo[key]
+        if time.monotonic() > self.deadline:
+            raise HintTimeoutError
+
+        result = {}
+        for mine in (0, 1):
+            next_needed = self._place(position, needed, mine)
+            if next_needed is None:
+                continue
+
+            for mines, (layouts, cell_layouts) in self._count(
+                position + 1, next_needed
+            ).items():
+                _add_layouts(
+                    result, mines + mine, layouts, (layouts * mine, *cell_layouts)
+                )
+
+        self.memo[key] = result
+        return result
+
+    def _place(
+        self, position: int, needed: tuple[int, ...], mine: int
+    ) -> t.Optional[tuple[int, ...]]:
+        """Get the mines still needed after placing `mine`, or None if invalid."""
+        after = self.cells_after[position]
+        next_needed = list(needed)
+        for j in self.cell_constraints[position]:
+            next_needed[j] -= mine
+            if not 0 <= next_needed[j] <= after[j]:
+                return None
+        return tuple(next_needed)
+
+
+def _add_layouts(
+    result: dict, mines: int, layouts: int, cell_layouts: tuple[int, ...]
+) -> None:
+    """Add layouts with `mines` mines to a layout count."""
+    if mines in result:
+        previous, previous_cells = result[mines]
+        result[mines] = (
+            previous + layouts,
+            tuple(a + b for a, b in zip(previous_cells, cell_layouts)),
+        )
+    else:
+        result[mines] = (layouts, cell_layouts)
+
+
+def _convolve(distributions: list[dict[int, int]]) -> dict[int, int]:
+    """Combine per-component layout counts into counts by total mines."""
+    total = {0: 1}
+    for distribution in distributions:
+        combined = defaultdict(int)
+        for mines, layouts in total.items():
+            for more_mines, more_layouts in distribution.items():
+                combined[mines + more_mines] += layouts * more_layouts
+        total = combined
+    return total
+
+
+def _rest_layouts(rest: int, mines_left: int, mines: int) -> int:
+    """Count the ways to place the leftover mines on unconstrained cells."""
+    leftover = mines_left - mines
+    if not 0 <= leftover <= rest:
+        return 0
+    return comb(rest, leftover)
+
+
+def mine_probabilities(
+    board: Board, frontier: set[int], mines: set[int], deadline: float
+) -> dict[int, float]:
+    """Get the chance of every covered cell, apart from known `mines`, being a mine.
+
+    Independent groups of constraints are counted separately and then
+    combined with the global mine count.
+    """
+    covered = board.covered
+    constraints, _, _ = build_constraints(board, frontier, mines)
+    components = []
+    constrained = set()
+    for group in _components(constraints):
+        cells = sorted({cell for group_cells, _ in group for cell in group_cells})
+        constrained.update(cells)
+        components.append((cells, _LayoutCounter(cells, group, deadline).count()))
+
+    rest = [
+        cell
+        for cell in range(board.size)
+        if covered[cell] and cell not in mines and cell not in constrained
+    ]
+    mines_left = board.num_bombs - len(mines)
+    distributions = [
+        {mines: layouts for mines, (layouts, _) in layouts_by_mines.items()}
+        for _, layouts_by_mines in components
+    ]
+    all_layouts = _convolve(distributions)
+
+    total = sum(
+        layouts * _rest_layouts(len(rest), mines_left, mines)
+        for mines, layouts in all_layouts.items()
+    )
+    if total == 0:
+        raise ValueError("The board has no possible mine layouts")
+
+    probabilities = {}
+    for i, (cells, layouts_by_mines) in enumerate(components):
+        others = _convolve(distributions[:i] + distributions[i + 1 :])
+        mine_layouts = [0] * len(cells)
+        for mines, (_, cell_layouts) in layouts_by_mines.items():
+            weight = sum(
+                layouts * _rest_layouts(len(rest), mines_left, mines + other_mines)
+                for other_mines, layouts in others.items()
+            )
+            for position, layouts in enumerate(cell_layouts):
+                mine_layouts[position] += layouts * weight
+        for cell, layouts in zip(cells, mine_layouts):
+            probabilities[cell] = layouts / total
+
+    if rest:
+        # Every unconstrained cell has the same chance of being a mine
+        rest_mines = sum(
+            layouts * _rest_layouts(len(rest), mines_left, mines) * (mines_left - mines)
+            for mines, layouts in all_layouts.items()
+        )
+        probability = rest_mines / (len(rest) * total)
+        for cell in rest:
+            probabilities[cell] = probability
+
+    return probabilities
+
+
+def find_hint(board: Board, time_budget: float = HINT_TIME_BUDGET) -> tuple[int, float]:
+    """Find the best covered cell to dig next.
+
+    Returns the cell and its chance of being a mine, which is 0 if the cell is
+    certainly safe. Only uses what a player can see, so flags are ignored.
+
+    Raises `HintTimeoutError` if it takes longer than `time_budget` seconds.
+    This is CPU heavy, so run it in a process pool.
+    """
+    deadline = time.monotonic() + time_budget
+    if not board.started:
+        # The first click is always safe
+        return board.index(board.width // 2, board.height // 2), 0.0
+
+    frontier = {
+        cell
+        for cell in range(board.size)
+        if not board.covered[cell] and board.counts[cell]
+    }
+    mines = set()
+    safe = deduce(board, frontier, mines)
+    if safe:
+        return min(safe), 0.0
+
+    probabilities = mine_probabilities(board, frontier, mines, deadline)
+    cell = min(probabilities, key=lambda cell: (probabilities[cell], cell))
+    return cell, probabilities[cell]
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+class Saveable(t.Protocol):
+    """Something that can be saved in a `GameStore`."""
+
+    def to_bytes(self) -> bytes:
+        """Encode the game."""
+        ...
+
+
+Game = t.TypeVar("Game", bound=Saveable)
+
+
+class GameStore(t.Generic[Game]):
+    """Saves in-progress games to a SQLite database.
+
+    Saves are debounced: changed games are only encoded and written once every
+    `delay` seconds, in a single transaction. All database access happens on
+    one worker thread, so the event loop never waits on the disk.
+    """
+
+    def __init__(
+        self, path: t.Union[str, Path], decode: t.Callable[[bytes], Game], delay: float
+    ):
+        self.path = Path(path)
+        self.decode = decode
+        self.delay = delay
+
+        self._pending: dict[str, t.Optional[Game]] = {}
+        self._flush_task: t.Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="game-store"
+        )
+        self._db = self._executor.submit(self._connect).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, creating it if needed."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS games (key TEXT PRIMARY KEY, data BLOB)")
+        db.commit()
+        return db
+
+    def save(self, key: str, game: Game) -> None:
+        """Save `game` the next time the store is flushed."""
+        self._pending[key] = game
+        self._schedule_flush()
+
+    def delete(self, key: str) -> None:
+        """Delete the game saved as `key` the next time the store is flushed."""
+        self._pending[key] = None
+        self._schedule_flush()
+
+    async def load(self, key: str) -> t.Optional[Game]:
+        """Load the game saved as `key`, if there is one."""
+        if key in self._pending:
+            return self._pending[key]
+
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self._executor, self._read, key)
+        if data is None:
+            return None
+
+        try:
+            return self.decode(data)
+        except ValueError:
+            log.exception(f"Could not load the saved game `{key}`")
+            return None
+
+    def _read(self, key: str) -> t.Optional[bytes]:
+        cursor = self._db.execute("SELECT data FROM games WHERE key = ?", (key,))
+        row = cursor.fetchone()
+        return row[0] if row is not None else None
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.delay)
+        self._flush_task = None
+        await self.flush()
+
+    def _take_pending(self) -> tuple[list[tuple[str, bytes]], list[tuple[str]]]:
+        """Encode the pending changes, so they can be written on another thread."""
+        saves = []
+        deletes = []
+        for key, game in self._pending.items():
+            if game is None:
+                deletes.append((key,))
+            else:
+                saves.append((key, game.to_bytes()))
+        self._pending.clear()
+        return saves, deletes
+
+    async def flush(self) -> None:
+        """Write every pending change to the database."""
+        if not self._pending:
+            return
+
+        saves, deletes = self._take_pending()
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write, saves, deletes)
+        except sqlite3.Error:
+            log.exception("Could not save Minesweeper games")
+
+    def _write(self, saves: list[tuple[str, bytes]], deletes: list[tuple[str]]) -> None:
+        with self._db:
+            self._db.executemany("REPLACE INTO games (key, data) VALUES (?, ?)", saves)
+            self._db.executemany("DELETE FROM games WHERE key = ?", deletes)
+        log.trace("Saved %d games and deleted %d games", len(saves), len(deletes))
+
+    def close(self) -> None:
+        """Write every pending change and close the database.
+
+        This blocks until everything is written, so only use it when shutting down.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        saves, deletes = self._take_pending()
+        try:
+            self._executor.submit(self._write, saves, deletes).result()
+        except sqlite3.Error:
+            log.exception("Could not save Minesweeper games")
+        finally:
+            self._executor.submit(self._db.close).result()
+            self._executor.shutdown()
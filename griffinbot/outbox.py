@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import typing as t
+
+import discord
+
+log = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 2000
+
+
+class _Send(t.NamedTuple):
+    content: t.Optional[str]
+    embed: t.Optional[discord.Embed]
+    future: asyncio.Future
+    # Sends are only merged if they have the same key, and never if it's None
+    key: t.Optional[int]
+
+
+class _Channel:
+    """The sends waiting to go to a channel, and when it last sent messages."""
+
+    __slots__ = ("destination", "pending", "sent", "paused_until", "task")
+
+    def __init__(self, destination: discord.abc.Messageable, rate: int):
+        self.destination = destination
+        self.pending: collections.deque[_Send] = collections.deque()
+        # Times of the last `rate` messages sent to the channel
+        self.sent: collections.deque[float] = collections.deque(maxlen=rate)
+        self.paused_until = float("-inf")
+        self.task: t.Optional[asyncio.Task] = None
+
+
+def _join(first: t.Optional[str], second: t.Optional[str]) -> t.Optional[str]:
+    """Join the contents of two messages into one."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return f"{first}\n{second}"
+
+
+def _retry_after(error: discord.HTTPException) -> float:
+    """Get how long a rate limit response said to wait, in seconds."""
+    headers = getattr(error.response, "headers", {})
+    for header in ("X-RateLimit-Reset-After", "Retry-After"):
+        try:
+            return float(headers[header])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 1.0
+
+
+class Outbox:
+    """Queues messages by channel, merging them to send fewer messages.
+
+    Texts queued one after another for the same command, or as DMs to the
+    same user, are joined into one message while they fit, and a text
+    followed by an embed is sent as one message. At most `rate`
+    messages are sent to a channel every `per` seconds, the channel's rate
+    limit, so sends wait here instead of running into it. If Discord still
+    rate limits a channel, nothing is sent to it until the limit resets.
+    """
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+
+        self._channels: dict[int, _Channel] = {}
+
+    def __len__(self):
+        return sum(len(channel.pending) for channel in self._channels.values())
+
+    def queued(self, channel_id: int) -> int:
+        """Get the number of sends waiting to go to a channel."""
+        channel = self._channels.get(channel_id)
+        return len(channel.pending) if channel is not None else 0
+
+    def send(
+        self,
+        destination: discord.abc.Messageable,
+        content: t.Optional[str] = None,
+        *,
+        embed: t.Optional[discord.Embed] = None,
+        merge: bool = True,
+    ) -> asyncio.Future:
+        """Queue a message for a channel, user or command context.
+
+        Returns a future for the message it was sent in, which other sends
+        might have been merged into. Pass `merge=False` for messages that will
+        be edited, so nothing else is sent in them.
+        """
+        if not merge:
+            key = None
+        elif isinstance(destination, discord.abc.User):
+            key = destination.id
+        else:
+            # Only contexts have a message to tell their command's sends apart
+            message = getattr(destination, "message", None)
+            key = message.id if message is not None else None
+
+        # Contexts send to their channel, so share its queue
+        destination = getattr(destination, "channel", destination)
+        future = asyncio.get_running_loop().create_future()
+
+        channel = self._channels.get(destination.id)
+        if channel is None:
+            channel = self._channels[destination.id] = _Channel(destination, self.rate)
+        content = str(content) if content is not None else None
+        channel.pending.append(_Send(content, embed, future, key))
+        log.trace("%d sends queued for %d", len(channel.pending), destination.id)
+
+        if channel.task is None:
+            channel.task = asyncio.create_task(self._run(destination.id, channel))
+        return future
+
+    def close(self) -> None:
+        """Stop sending, cancelling the sends that are left."""
+        for channel in self._channels.values():
+            if channel.task is not None:
+                channel.task.cancel()
+            for send in channel.pending:
+                send.future.cancel()
+        self._channels.clear()
+
+    def _take(self, channel: _Channel) -> list[_Send]:
+        """Take the next sends that fit in one message off a channel's queue."""
+        sends: list[_Send] = []
+        content = None
+        while channel.pending:
+            send = channel.pending[0]
+            if send.future.done():
+                channel.pending.popleft()  # Cancelled while waiting
+                continue
+
+            if sends and (send.key is None or send.key != sends[0].key):
+                break
+            merged = _join(content, send.content)
+            if sends and merged is not None and len(merged) > MESSAGE_LIMIT:
+                break
+            channel.pending.popleft()
+            sends.append(send)
+            content = merged
+            if send.embed is not None or send.key is None:
+                break  # One embed per message, and texts after it go below
+        return sends
+
+    async def _run(self, channel_id: int, channel: _Channel) -> None:
+        """Send a channel's queue until it's empty."""
+        loop = asyncio.get_running_loop()
+        try:
+            while channel.pending:
+                wait_until = channel.paused_until
+                if len(channel.sent) == self.rate:
+                    wait_until = max(wait_until, channel.sent[0] + self.per)
+                delay = wait_until - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                sends = self._take(channel)
+                if sends:
+                    channel.sent.append(loop.time())
+                    await self._deliver(channel_id, channel, sends)
+        finally:
+            if channel.task is asyncio.current_task():
+                channel.task = None
+                # Remember the recent sends until they stop counting
+                loop.call_later(self.per, self._forget, channel_id, channel)
+
+    async def _deliver(
+        self, channel_id: int, channel: _Channel, sends: list[_Send]
+    ) -> None:
+        """Send merged sends as one message, resolving their futures."""
+        content = None
+        for send in sends:
+            content = _join(content, send.content)
+        if len(sends) > 1:
+            log.trace("Merged %d sends to %d", len(sends), channel_id)
+
+        try:
+            message = await channel.destination.send(content, embed=sends[-1].embed)
+        except Exception as e:
+            if isinstance(e, discord.HTTPException) and e.status == 429:
+                retry_after = _retry_after(e)
+                log.warning(
+                    f"Rate limited in {channel_id}, waiting {retry_after:.2f} seconds"
+                )
+                channel.paused_until = asyncio.get_running_loop().time() + retry_after
+            for send in sends:
+                if not send.future.done():
+                    send.future.set_exception(e)
+        else:
+            for send in sends:
+                if not send.future.done():
+                    send.future.set_result(message)
+
+    def _forget(self, channel_id: int, channel: _Channel) -> None:
+        """Drop a channel that hasn't had anything to send for a while."""
+        if (
+            channel.task is None
+            and not channel.pending
+            and self._channels.get(channel_id) is channel
+        ):
+            del self._channels[channel_id]
@@ -0,0 +1,64 @@
+"""Check that debug and trace logs are only formatted when they're logged.
+
+Their messages take %-style arguments, so building the message eagerly, with
+an f-string, `str.format` or `%`, is reported. Used as a pre-commit hook.
+"""
+
+import ast
+import sys
+
+LAZY_METHODS = {"debug", "trace"}
+
+
+def eager_formatting(node: ast.expr) -> bool:
+    """Check if a log message is formatted before it's passed to the logger."""
+    for child in ast.walk(node):
+        if isinstance(child, ast.JoinedStr):
+            return True
+        if (
+            isinstance(child, ast.Call)
+            and isinstance(child.func, ast.Attribute)
+            and child.func.attr == "format"
+        ):
+            return True
+        if (
+            isinstance(child, ast.BinOp)
+            and isinstance(child.op, ast.Mod)
+            and isinstance(child.left, ast.Constant)
+            and isinstance(child.left.value, str)
+        ):
+            return True
+    return False
+
+
+def check(path: str) -> list[str]:
+    """Get an error for every eagerly formatted debug or trace log in a file."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+
+    errors = []
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr in LAZY_METHODS
+            and node.args
+            and eager_formatting(node.args[0])
+        ):
+            errors.append(
+                f"{path}:{node.lineno}: {node.func.attr} message is formatted "
+                + "eagerly, pass %-style arguments instead"
+            )
+    return errors
+
+
+def main() -> int:
+    """Check the files given as arguments."""
+    errors = [error for path in sys.argv[1:] for error in check(path)]
+    for error in errors:
+        print(error)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())